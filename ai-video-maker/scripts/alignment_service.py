@@ -8,9 +8,10 @@ Fallback: If WhisperX is not available, generates static ASS subtitles
 based on even time division of the narration text.
 """
 
+import json
 import os
 import re
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 
 
 @dataclass
@@ -85,15 +86,44 @@ def align_audio(audio_path: str, text: str, language: str = "zh") -> list[WordTi
     return words
 
 
+def alignment_path(audio_path: str) -> str:
+    """Where align_audio_cached keeps the word timestamps of a WAV."""
+    return os.path.splitext(audio_path)[0] + ".words.json"
+
+
+def align_audio_cached(audio_path: str, text: str, language: str = "zh") -> list[WordTimestamp]:
+    """align_audio, memoized in a .words.json file next to the audio.
+
+    Alignment depends only on the audio, the text, the language and the
+    aligner, not on resolution or style, so every preset and re-render of
+    the page reuses one result.
+    """
+    from fingerprint import file_digest
+
+    backend = "whisperx" if _check_whisperx_available() else "even_division"
+    key = [file_digest(audio_path), text, language, backend]
+    cache_file = alignment_path(audio_path)
+    try:
+        with open(cache_file, encoding="utf-8") as f:
+            data = json.load(f)
+        if data["key"] == key:
+            return [WordTimestamp(**w) for w in data["words"]]
+    except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError):
+        pass
+
+    words = align_audio(audio_path, text, language)
+    if words:
+        tmp = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "words": [asdict(w) for w in words]}, f, ensure_ascii=False)
+        os.replace(tmp, cache_file)
+    return words
+
+
 def _get_audio_duration(audio_path: str) -> float:
-    """Get audio duration via ffprobe."""
-    import subprocess
-    r = subprocess.run(
-        ["ffprobe", "-v", "quiet", "-show_entries", "format=duration", "-of", "csv=p=0",
-         audio_path],
-        capture_output=True, text=True,
-    )
-    return float(r.stdout.strip())
+    """Get audio duration (cached ffprobe, see media_info)."""
+    import media_info
+    return media_info.duration(audio_path)
 
 
 def _fallback_even_division(audio_path: str, text: str) -> list[WordTimestamp]:
@@ -247,7 +277,7 @@ def generate_dynamic_subtitles(audio_path: str, narration_text: str,
     try:
         # Step 1: Align
         print(f"    Aligning audio to text...")
-        words = align_audio(audio_path, narration_text, language)
+        words = align_audio_cached(audio_path, narration_text, language)
         if not words:
             print(f"    No words aligned")
             return False
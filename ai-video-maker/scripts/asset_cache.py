@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Content-addressed asset cache shared across projects — hardlinks + LRU eviction."""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+# Stores between full rescans of the cache directory; other processes add
+# entries too, so the running size total only tracks this process's stores
+_RESCAN_EVERY = 64
+# An over-full cache is trimmed to this fraction of the cap, so the next
+# stores fit without another scan
+_LOW_WATER = 0.9
+
+
+def cache_key(*parts) -> str:
+    """Stable SHA-256 key for any JSON-serializable inputs."""
+    blob = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    """Atomically place src at dst as a hardlink (copy across filesystems)."""
+    tmp = f"{dst}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copy2(src, tmp)
+    os.replace(tmp, dst)
+
+
+class AssetCache:
+    """Directory of files named by content key, bounded by total size.
+
+    Entries are hardlinked into (and out of) project directories, so a hit
+    costs no copy and evicting an entry never breaks a project that uses it.
+    Recency is the entry mtime, refreshed on every hit; eviction removes the
+    least recently used entries once the cache outgrows max_bytes. The
+    directory is walked only when the running size total passes the cap or
+    every _RESCAN_EVERY stores, not on every store.
+
+    Usage:
+        cache = AssetCache("~/.cache/ai-video-maker/tts", max_mb=2048, ext=".wav")
+        key = cache_key("gemini", "Leda", 1.0, text)
+        if not cache.fetch(key, "audio/page_01.wav"):
+            synthesize("audio/page_01.wav")
+            cache.store(key, "audio/page_01.wav")
+    """
+
+    def __init__(self, root: str, max_mb: int = 2048, ext: str = ""):
+        self.root = os.path.expanduser(root)
+        self.max_bytes = max_mb * 1024 * 1024
+        self.ext = ext
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._size = None                        # bytes, as of the last scan plus stores
+        self._stores = 0
+        os.makedirs(self.root, exist_ok=True)
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key + self.ext)
+
+    def contains(self, key: str) -> bool:
+        return os.path.exists(self.path_for(key))
+
+    def lookup(self, key: str):
+        """Path of the cached entry (marked as recently used), or None on a miss."""
+        entry = self.path_for(key)
+        try:
+            os.utime(entry)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def fetch(self, key: str, dest: str) -> bool:
+        """Link a cached entry to dest. Returns False on a miss."""
+        entry = self.path_for(key)
+        try:
+            _link_or_copy(entry, dest)
+            os.utime(entry)                      # mark as recently used
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return False
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def store(self, key: str, src: str) -> None:
+        """Add src under key, then evict down to the size cap if it may be exceeded."""
+        entry = self.path_for(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        try:
+            replaced = os.path.getsize(entry)
+        except FileNotFoundError:
+            replaced = 0
+        _link_or_copy(src, entry)
+        os.utime(entry)
+        with self._lock:
+            self._stores += 1
+            if self._size is not None:
+                self._size += os.path.getsize(entry) - replaced
+            scan = (self._size is None or self._size > self.max_bytes
+                    or self._stores % _RESCAN_EVERY == 0)
+        if scan:
+            self.evict()
+
+    def evict(self) -> int:
+        """Remove least recently used entries once over max_bytes. Returns count removed.
+
+        An over-full cache is trimmed to _LOW_WATER of max_bytes.
+        """
+        with self._lock:
+            entries = []
+            total = 0
+            for dirpath, _, files in os.walk(self.root):
+                for name in files:
+                    if name.endswith(".tmp"):
+                        continue
+                    path = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, path))
+                    total += st.st_size
+
+            removed = 0
+            target = self.max_bytes if total <= self.max_bytes else self.max_bytes * _LOW_WATER
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+            self._size = total
+            return removed
+
+    def report(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        return f"{self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate)"
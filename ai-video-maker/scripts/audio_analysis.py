@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Whole-file WAV analysis — peak, RMS and silence in one vectorized pass.
+
+The sample data is memory-mapped and viewed as a numpy array, so a page of
+narration is scanned end to end without copying it into Python objects.
+Silence is measured on 10 ms blocks: a block is silent when its peak is
+below SILENCE_DB. tts_service.verify_audio, the validator and the legacy
+create_video.py all judge audio from the same AudioStats.
+
+Usage:
+    stats = audio_analysis.analyze("audio/page_01.wav")
+    stats.peak_db, stats.leading_silence, stats.longest_silence
+"""
+
+import math
+import mmap
+from dataclasses import dataclass
+
+import numpy as np
+
+import media_info
+
+SILENCE_DB = -50.0                  # blocks quieter than this count as silence
+FLOOR_DB = -120.0                   # reported level of digital silence (JSON has no -inf)
+BLOCK_SECONDS = 0.01
+MIN_AUDIBLE_SECONDS = 0.3           # less than this is a click, not narration
+
+# (WAVE format tag, bits per sample) -> sample dtype; 24-bit is unpacked by hand
+_DTYPES = {
+    (1, 8): np.uint8, (1, 16): np.dtype("<i2"), (1, 32): np.dtype("<i4"),
+    (3, 32): np.dtype("<f4"), (3, 64): np.dtype("<f8"),
+}
+
+
+def _db(level: float) -> float:
+    """dBFS of a 0..1 level, never below FLOOR_DB."""
+    return max(FLOOR_DB, 20 * math.log10(level)) if level > 0 else FLOOR_DB
+
+
+@dataclass(frozen=True)
+class AudioStats:
+    duration: float                  # seconds
+    peak: float                      # 0..1 of full scale
+    rms: float                       # 0..1 of full scale
+    leading_silence: float           # seconds before the first audible block
+    trailing_silence: float          # seconds after the last audible block
+    longest_silence: float           # longest silent span between audible blocks
+
+    @property
+    def audible(self) -> float:
+        """Seconds between the first and the last audible block."""
+        return max(0.0, self.duration - self.leading_silence - self.trailing_silence)
+
+    @property
+    def peak_db(self) -> float:
+        return _db(self.peak)
+
+    @property
+    def rms_db(self) -> float:
+        return _db(self.rms)
+
+    @property
+    def is_silent(self) -> bool:
+        return self.audible < MIN_AUDIBLE_SECONDS
+
+
+def _samples(buf, layout) -> np.ndarray:
+    """Samples of buf as a (frames, channels) array, scaled so full scale is 1.0."""
+    count = layout.data_size // (layout.bits // 8) // layout.channels * layout.channels
+    if (layout.format_tag, layout.bits) == (1, 24):
+        raw = np.frombuffer(buf, np.uint8, count * 3, layout.data_offset).reshape(-1, 3)
+        x = (raw[:, 0].astype(np.int32) | raw[:, 1].astype(np.int32) << 8
+             | raw[:, 2].astype(np.int8).astype(np.int32) << 16)
+        return x.reshape(-1, layout.channels) / float(1 << 23)
+    x = np.frombuffer(buf, _DTYPES[(layout.format_tag, layout.bits)], count, layout.data_offset)
+    x = x.reshape(-1, layout.channels)
+    if layout.format_tag == 3:
+        return x
+    if layout.bits == 8:
+        return (x.astype(np.int16) - 128) / 128.0
+    return x / float(1 << (layout.bits - 1))
+
+
+def _silent_runs(silent: np.ndarray) -> tuple[int, int, int]:
+    """(leading, trailing, longest inner) run lengths of True in silent."""
+    audible = np.flatnonzero(~silent)
+    if not audible.size:
+        return len(silent), 0, 0
+    first, last = audible[0], audible[-1]
+    gaps = np.diff(audible) - 1                 # silent blocks between audible ones
+    return int(first), int(len(silent) - 1 - last), int(gaps.max()) if gaps.size else 0
+
+
+def analyze(path: str):
+    """AudioStats of a PCM WAV, or None if it is not one or cannot be read."""
+    layout = media_info.wav_layout(path)
+    if (layout is None or (layout.format_tag, layout.bits) not in {*_DTYPES, (1, 24)}
+            or not layout.channels or not layout.sample_rate):
+        return None
+    try:
+        with open(path, "rb") as f:
+            if layout.data_size < layout.channels * layout.bits // 8:
+                return AudioStats(0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                return _analyze(_samples(buf, layout), layout.sample_rate)
+    except (OSError, ValueError):
+        return None
+
+
+def _analyze(x: np.ndarray, rate: int) -> AudioStats:
+    # Loudest channel per frame, then per 10 ms block
+    level = np.abs(x).max(axis=1)
+    block = max(1, int(rate * BLOCK_SECONDS))
+    n_blocks = -(-len(level) // block)
+    padded = np.zeros(n_blocks * block, level.dtype)
+    padded[:len(level)] = level
+    silent = padded.reshape(n_blocks, block).max(axis=1) < 10 ** (SILENCE_DB / 20)
+    leading, trailing, longest = _silent_runs(silent)
+
+    duration = len(level) / rate
+    to_seconds = block / rate
+    return AudioStats(
+        duration=duration,
+        peak=float(level.max()),
+        rms=float(np.sqrt(np.mean(np.square(x, dtype=np.float64)))),
+        leading_silence=min(duration, leading * to_seconds),
+        trailing_silence=min(duration, trailing * to_seconds),
+        longest_silence=longest * to_seconds,
+    )
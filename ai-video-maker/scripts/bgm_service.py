@@ -2,17 +2,15 @@
 """BGM (Background Music) service — loop/trim, mix with voiceover, fade in/out."""
 
 import os
-import subprocess
 import tempfile
 
+import media_info
+import tracing
+
 
 def get_duration(path: str) -> float:
     """Get media file duration in seconds."""
-    r = subprocess.run(
-        ["ffprobe", "-v", "quiet", "-show_entries", "format=duration", "-of", "csv=p=0", path],
-        capture_output=True, text=True,
-    )
-    return float(r.stdout.strip())
+    return media_info.duration(path)
 
 
 def prepare_bgm(bgm_path: str, target_duration: float, output_path: str,
@@ -47,7 +45,7 @@ def prepare_bgm(bgm_path: str, target_duration: float, output_path: str,
             output_path,
         ]
         try:
-            r = subprocess.run(cmd, capture_output=True, text=True)
+            r = tracing.run(cmd, capture_output=True, text=True)
             return r.returncode == 0
         finally:
             os.unlink(list_path)
@@ -62,7 +60,7 @@ def prepare_bgm(bgm_path: str, target_duration: float, output_path: str,
             "-c:a", "aac", "-b:a", "128k",
             output_path,
         ]
-        r = subprocess.run(cmd, capture_output=True, text=True)
+        r = tracing.run(cmd, capture_output=True, text=True)
         return r.returncode == 0
 
 
@@ -85,7 +83,7 @@ def mix_audio(voiceover_path: str, bgm_path: str, output_path: str,
         "-c:a", "aac", "-b:a", "192k",
         output_path,
     ]
-    r = subprocess.run(cmd, capture_output=True, text=True)
+    r = tracing.run(cmd, capture_output=True, text=True)
     return r.returncode == 0
 
 
@@ -130,7 +128,7 @@ def add_bgm_to_video(video_path: str, bgm_path: str, output_path: str,
             "-movflags", "+faststart",
             output_path,
         ]
-        r = subprocess.run(cmd, capture_output=True, text=True)
+        r = tracing.run(cmd, capture_output=True, text=True)
         if r.returncode == 0:
             sz = os.path.getsize(output_path) / (1024 * 1024)
             print(f"  BGM added: {output_path} ({sz:.1f}MB)")
@@ -1,13 +1,26 @@
 #!/usr/bin/env python3
-"""Pipeline checkpoint/resume system — persist progress across runs."""
+"""Pipeline checkpoint/resume system — persist progress across runs.
+
+State lives in two files: a JSON snapshot and an append-only JSONL journal.
+Each mark appends one line to the journal instead of rewriting the whole
+state; the journal is folded into the snapshot (written to a temp file and
+renamed into place) every COMPACT_EVERY records and when a run starts.
+A crash can at most lose a partially written last journal line, which is
+ignored on load.
+"""
 
 import json
 import os
+import threading
 from dataclasses import dataclass, field, asdict
 from datetime import datetime
 
 
 CHECKPOINT_FILE = ".pipeline_state.json"
+JOURNAL_FILE = ".pipeline_state.journal"
+
+# Journal records appended before they are folded into the snapshot
+COMPACT_EVERY = 200
 
 
 @dataclass
@@ -16,6 +29,7 @@ class StepState:
     completed: bool = False
     timestamp: str = ""
     error: str = ""
+    fingerprint: str = ""   # hash of the inputs the artifact was built from
 
 
 @dataclass
@@ -33,69 +47,142 @@ class CheckpointManager:
 
     def __init__(self, project_dir: str):
         self.state_path = os.path.join(project_dir, CHECKPOINT_FILE)
+        self.journal_path = os.path.join(project_dir, JOURNAL_FILE)
         self.state = PipelineState()
+        self._journal_records = 0
+        # Page nodes run concurrently in dag mode; serialize state mutations
+        self._lock = threading.RLock()
 
     def load(self) -> bool:
-        """Load existing checkpoint. Returns True if found."""
-        if not os.path.exists(self.state_path):
-            return False
-        try:
-            with open(self.state_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            self.state = PipelineState(
-                config_path=data.get("config_path", ""),
-                started_at=data.get("started_at", ""),
-                updated_at=data.get("updated_at", ""),
-                pages=data.get("pages", {}),
-            )
-            return True
-        except (json.JSONDecodeError, KeyError):
-            return False
+        """Load existing checkpoint (snapshot + journal). Returns True if found."""
+        found = False
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.state = PipelineState(
+                    config_path=data.get("config_path", ""),
+                    started_at=data.get("started_at", ""),
+                    updated_at=data.get("updated_at", ""),
+                    pages=data.get("pages", {}),
+                )
+                found = True
+            except (json.JSONDecodeError, KeyError):
+                pass
+
+        replayed = self._replay_journal()
+        if replayed:
+            # Start the run from a compact snapshot and an empty journal
+            self.save()
+        return found or replayed > 0
+
+    def _replay_journal(self) -> int:
+        """Apply journal records on top of the snapshot. Returns records applied."""
+        if not os.path.exists(self.journal_path):
+            return 0
+        applied = 0
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                    self._apply(rec["page"], rec["step"], rec["state"])
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    break                      # torn write at the tail
+                self.state.updated_at = rec.get("at", self.state.updated_at)
+                applied += 1
+        if applied and not self.state.started_at:
+            self.state.started_at = self.state.updated_at
+        return applied
+
+    def _apply(self, page_key: str, step_name: str, step_data: dict) -> None:
+        self.state.pages.setdefault(page_key, {})[step_name] = step_data
+
+    def _append(self, page_num, step_name: str, step_data: dict) -> None:
+        """Record one step transition in memory and in the journal."""
+        page_key = str(page_num)
+        self._apply(page_key, step_name, step_data)
+        self.state.updated_at = step_data["timestamp"]
+        rec = {"page": page_key, "step": step_name, "state": step_data,
+               "at": self.state.updated_at}
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self._journal_records += 1
+        if self._journal_records >= COMPACT_EVERY:
+            self.save()
 
     def save(self) -> None:
-        """Persist current state to disk."""
-        self.state.updated_at = datetime.now().isoformat()
-        with open(self.state_path, "w", encoding="utf-8") as f:
-            json.dump(asdict(self.state), f, indent=2, ensure_ascii=False)
+        """Write a full snapshot atomically and truncate the journal."""
+        with self._lock:
+            if not self.state.updated_at:
+                self.state.updated_at = datetime.now().isoformat()
+            tmp = self.state_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(asdict(self.state), f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.state_path)
+            # Journal records are absolute step states, so replaying them
+            # again after a crash right here is harmless
+            if os.path.exists(self.journal_path):
+                os.unlink(self.journal_path)
+            self._journal_records = 0
 
     def init_run(self, config_path: str) -> None:
         """Initialize a new run (only if no existing state)."""
         if not self.state.started_at:
             self.state.config_path = config_path
             self.state.started_at = datetime.now().isoformat()
+            self.state.updated_at = self.state.started_at
             self.save()
 
-    def is_completed(self, page_num: int, step_name: str) -> bool:
-        """Check if a specific step for a page is already completed."""
+    def is_completed(self, page_num: int, step_name: str, fingerprint: str = None) -> bool:
+        """Check if a specific step for a page is already completed.
+
+        If fingerprint is given, a completion recorded with a different
+        fingerprint counts as stale (not completed). Completions recorded
+        without one (older checkpoints) are accepted as-is.
+        """
         page_key = str(page_num)
         if page_key not in self.state.pages:
             return False
         step_data = self.state.pages[page_key].get(step_name, {})
-        return step_data.get("completed", False)
-
-    def mark_completed(self, page_num: int, step_name: str) -> None:
-        """Mark a step as completed for a page and save."""
-        page_key = str(page_num)
-        if page_key not in self.state.pages:
-            self.state.pages[page_key] = {}
-        self.state.pages[page_key][step_name] = {
-            "completed": True,
-            "timestamp": datetime.now().isoformat(),
-            "error": "",
-        }
-        self.save()
+        if not step_data.get("completed", False):
+            return False
+        return not self.is_stale(page_num, step_name, fingerprint)
+
+    def get_fingerprint(self, page_num: int, step_name: str) -> str:
+        """Fingerprint recorded with the last completion ("" if none)."""
+        step_data = self.state.pages.get(str(page_num), {}).get(step_name, {})
+        return step_data.get("fingerprint", "")
+
+    def is_stale(self, page_num: int, step_name: str, fingerprint: str = None) -> bool:
+        """True if a fingerprint was recorded and differs from the given one.
+
+        Only says the inputs changed; a missing or failed record is not
+        stale, so reuse decisions must go through is_completed.
+        """
+        recorded = self.get_fingerprint(page_num, step_name)
+        return bool(fingerprint and recorded and recorded != fingerprint)
+
+    def mark_completed(self, page_num: int, step_name: str, fingerprint: str = "") -> None:
+        """Mark a step as completed for a page and journal it."""
+        with self._lock:
+            self._append(page_num, step_name, {
+                "completed": True,
+                "timestamp": datetime.now().isoformat(),
+                "error": "",
+                "fingerprint": fingerprint,
+            })
 
     def mark_failed(self, page_num: int, step_name: str, error: str) -> None:
-        """Mark a step as failed for a page."""
-        page_key = str(page_num)
-        if page_key not in self.state.pages:
-            self.state.pages[page_key] = {}
-        self.state.pages[page_key][step_name] = {
-            "completed": False,
-            "timestamp": datetime.now().isoformat(),
-            "error": error,
-        }
-        self.save()
+        """Mark a step as failed for a page and journal it."""
+        with self._lock:
+            self._append(page_num, step_name, {
+                "completed": False,
+                "timestamp": datetime.now().isoformat(),
+                "error": error,
+                "fingerprint": "",
+            })
 
     def get_summary(self) -> dict:
         """Get summary of completed/pending/failed steps."""
@@ -113,8 +200,10 @@ class CheckpointManager:
     def reset(self) -> None:
         """Reset checkpoint (for --no-resume)."""
         self.state = PipelineState()
-        if os.path.exists(self.state_path):
-            os.unlink(self.state_path)
+        self._journal_records = 0
+        for path in (self.state_path, self.journal_path):
+            if os.path.exists(path):
+                os.unlink(path)
 
     def print_status(self) -> None:
         """Print current checkpoint status."""
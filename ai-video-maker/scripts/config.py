@@ -16,6 +16,11 @@ class TTSConfig:
     speed: float = 1.0                 # atempo factor (1.0 = normal, 1.1 = slightly faster)
     max_retries: int = 3
     retry_delay: float = 5.0
+    stream: bool = True                # Gemini: write audio as it streams in (False = one buffered response)
+    concurrency: int = 2               # pages synthesized in parallel
+    requests_per_minute: float = 30.0  # token-bucket rate, halved on every 429
+    cache_dir: str = "~/.cache/ai-video-maker/tts"  # shared audio cache ("" = disabled)
+    cache_max_mb: int = 2048           # LRU eviction above this size
 
 
 @dataclass
@@ -26,6 +31,9 @@ class ImageGenConfig:
     style_prompt: str = ""             # global style suffix appended to all prompts
     max_retries: int = 3
     retry_delay: float = 5.0
+    concurrency: int = 4               # image requests kept in flight on one event loop
+    cache_dir: str = "~/.cache/ai-video-maker/images"  # shared image cache ("" = disabled)
+    cache_max_mb: int = 4096           # LRU eviction above this size
 
 
 @dataclass
@@ -44,6 +52,8 @@ class SubtitleConfig:
     image_shrink: float = 1.0          # 0.92 for outlined (shrink image), 1.0 for boxed
     karaoke: bool = True               # word-by-word highlighting (dynamic mode)
     language: str = "zh"               # language for alignment (dynamic mode)
+    workers: int = 0                   # static burn processes (0 = auto from cores)
+    worker_memory_mb: int = 0          # memory budget for burn workers (0 = half of available RAM)
 
 
 @dataclass
@@ -67,9 +77,37 @@ class VideoConfig:
     transitions: list = field(default_factory=lambda: ["fade", "fadeblack", "slideleft", "dissolve", "fadewhite"])
     fade_in: float = 1.0
     fade_out: float = 1.5
-    buffer: float = 0.5               # extra pause after audio ends
+    buffer: float = 0.5               # pause between one page's narration and the next
     crf: int = 20
     preset: str = "medium"             # libx264 preset
+    encode_jobs: int = 0               # concurrent segment encodes (0 = auto from core budget)
+    encode_threads: int = 0            # total core budget shared by encodes (0 = all cores)
+    render_mode: str = "segments"      # "segments" (encode pages, then merge) | "single_pass" (one ffmpeg graph)
+    merge_strategy: str = "xfade"      # "xfade" (re-encode everything) | "smart" (re-encode transition windows only)
+    merge_chunk_size: int = 0          # xfade at most this many inputs per ffmpeg, merging in a tree (0 = flat)
+    kb_cache_dir: str = "~/.cache/ai-video-maker/kenburns"  # pre-scaled Ken Burns stills ("" = scale per frame)
+    kb_cache_max_mb: int = 2048        # LRU eviction above this size
+    adapt_cache_dir: str = "~/.cache/ai-video-maker/adapted"  # images adapted to the frame size ("" = per run)
+    adapt_cache_max_mb: int = 2048     # LRU eviction above this size
+
+
+@dataclass
+class PipelineConfig:
+    scheduler: str = "dag"             # "dag" (per-page dependency graph) | "steps" (one step at a time)
+    max_workers: int = 4               # concurrent nodes in dag mode
+
+
+@dataclass
+class DraftConfig:
+    scale: float = 0.333               # draft frame size relative to video width/height
+    fps: int = 15
+    preset: str = "ultrafast"
+    crf: int = 28
+
+
+# Subtitle sizes in pixels, scaled with the frame in draft mode
+_SUBTITLE_PIXEL_FIELDS = ["font_size", "outline_width", "box_padding", "box_radius",
+                          "margin_bottom", "line_spacing"]
 
 
 @dataclass
@@ -88,7 +126,10 @@ class ProjectConfig:
     subtitle: SubtitleConfig = field(default_factory=SubtitleConfig)
     bgm: BGMConfig = field(default_factory=BGMConfig)
     video: VideoConfig = field(default_factory=VideoConfig)
+    pipeline: PipelineConfig = field(default_factory=PipelineConfig)
+    draft: DraftConfig = field(default_factory=DraftConfig)
     pages: list = field(default_factory=list)  # list[PageConfig]
+    adapt_strategy_set: bool = False   # video.adapt_strategy given in the yaml (presets keep it)
 
 
 def _merge_dataclass(dc_class, data: dict):
@@ -119,16 +160,14 @@ def load_config(yaml_path: str) -> ProjectConfig:
         subtitle=_merge_dataclass(SubtitleConfig, raw.get("subtitle")),
         bgm=_merge_dataclass(BGMConfig, raw.get("bgm")),
         video=_merge_dataclass(VideoConfig, raw.get("video")),
+        pipeline=_merge_dataclass(PipelineConfig, raw.get("pipeline")),
+        draft=_merge_dataclass(DraftConfig, raw.get("draft")),
+        adapt_strategy_set=bool((raw.get("video") or {}).get("adapt_strategy")),
     )
 
     # Apply resolution preset if specified
     if config.video.resolution_preset:
-        from resolution_presets import get_preset
-        preset = get_preset(config.video.resolution_preset)
-        config.video.width = preset.width
-        config.video.height = preset.height
-        if not config.video.adapt_strategy:
-            config.video.adapt_strategy = preset.adapt_strategy
+        apply_resolution_preset(config, config.video.resolution_preset)
 
     # Parse pages
     for p in raw.get("pages", []):
@@ -142,26 +181,91 @@ def load_config(yaml_path: str) -> ProjectConfig:
         if not page.narration:
             raise ValueError(f"Page {page.page or i+1} is missing 'narration'")
 
+    if config.tts.requests_per_minute <= 0:
+        raise ValueError("tts.requests_per_minute must be positive")
+
+    if config.pipeline.scheduler not in ("dag", "steps"):
+        raise ValueError(f"Unknown pipeline.scheduler: {config.pipeline.scheduler}. Options: dag, steps")
+
+    if config.video.render_mode not in ("segments", "single_pass"):
+        raise ValueError(f"Unknown video.render_mode: {config.video.render_mode}. Options: segments, single_pass")
+
+    if config.video.merge_strategy not in ("xfade", "smart"):
+        raise ValueError(f"Unknown video.merge_strategy: {config.video.merge_strategy}. Options: xfade, smart")
+
+    if config.video.adapt_strategy not in ("", "crop_center", "letterbox", "blur_fill"):
+        raise ValueError(f"Unknown video.adapt_strategy: {config.video.adapt_strategy}. "
+                         "Options: crop_center, letterbox, blur_fill")
+
+    if not 0 < config.draft.scale <= 1:
+        raise ValueError("draft.scale must be in (0, 1]")
+
     return config
 
 
-def resolve_paths(config: ProjectConfig) -> dict:
-    """Return dict of resolved directory paths for the project."""
+def apply_resolution_preset(config: ProjectConfig, name: str) -> None:
+    """Switch config to a resolution preset (in place).
+
+    The preset's adapt strategy replaces whatever an earlier preset chose,
+    unless the yaml sets video.adapt_strategy explicitly.
+    """
+    from resolution_presets import get_preset
+    preset = get_preset(name)
+    config.video.resolution_preset = name
+    config.video.width = preset.width
+    config.video.height = preset.height
+    if not config.adapt_strategy_set:
+        config.video.adapt_strategy = preset.adapt_strategy
+
+
+def apply_draft_profile(config: ProjectConfig) -> None:
+    """Switch config to the draft preview profile (in place).
+
+    Frame size and subtitle pixel sizes shrink by draft.scale, so a draft
+    frame looks like a scaled-down production frame.
+    """
+    d = config.draft
+    config.video.width = max(2, round(config.video.width * d.scale / 2) * 2)
+    config.video.height = max(2, round(config.video.height * d.scale / 2) * 2)
+    config.video.fps = d.fps
+    config.video.preset = d.preset
+    config.video.crf = d.crf
+    for name in _SUBTITLE_PIXEL_FIELDS:
+        value = getattr(config.subtitle, name)
+        setattr(config.subtitle, name, max(1, round(value * d.scale)) if value else 0)
+
+
+def resolve_paths(config: ProjectConfig, variant: str = "") -> dict:
+    """Return dict of resolved directory paths for the project.
+
+    A variant (e.g. "draft", "shorts", "draft/shorts") keeps its own render
+    outputs and state under project_dir/<variant>/ while sharing audio and
+    images with the project. Drafts write images they generate themselves
+    to draft_images_dir instead of the shared images_dir.
+    """
     base = Path(config.project_dir)
+    out = base / variant if variant else base
     paths = {
         "project_dir": str(base),
+        "state_dir": str(out),                      # checkpoint, trace, validation report
         "audio_dir": str(base / "audio"),
         "images_dir": str(base / "images"),
-        "images_sub_dir": str(base / "images_sub"),
-        "subtitles_dir": str(base / "subtitles"),   # ASS subtitle files (dynamic mode)
-        "segments_dir": str(base / "segments"),
-        "output_dir": str(base / "video"),
-        "output_path": str(base / "video" / "final_subtitled.mp4"),
+        "normalized_images_dir": str(out / "images_norm"),   # images adapted to the frame
+        "images_sub_dir": str(out / "images_sub"),
+        "subtitles_dir": str(out / "subtitles"),    # ASS subtitle files (dynamic mode)
+        "segments_dir": str(out / "segments"),
+        "output_dir": str(out / "video"),
+        "output_path": str(out / "video" / "final_subtitled.mp4"),
     }
+    if Path(variant).parts[:1] == ("draft",):
+        paths["draft_images_dir"] = str(out / "images")     # images a draft had to make itself
     return paths
 
 
 def ensure_dirs(paths: dict) -> None:
     """Create all project directories."""
-    for key in ["audio_dir", "images_dir", "images_sub_dir", "subtitles_dir", "segments_dir", "output_dir"]:
+    for key in ["audio_dir", "images_dir", "draft_images_dir", "normalized_images_dir",
+                "images_sub_dir", "subtitles_dir", "segments_dir", "output_dir"]:
+        if key not in paths:
+            continue
         os.makedirs(paths[key], exist_ok=True)
@@ -5,9 +5,11 @@ DEPRECATED: 请使用 pipeline.py + YAML 配置代替。
 
 本文件保留用于向后兼容。新项目请使用 pipeline.py。
 """
-import os, subprocess, wave
+import os, subprocess
 from PIL import Image, ImageDraw, ImageFont
 
+import audio_analysis
+
 # ==================== CONFIG ====================
 
 AUDIO_DIR = "audio"           # TTS 音频目录
@@ -48,15 +50,9 @@ def get_duration(path):
     return float(r.stdout.strip())
 
 def verify_audio(path):
-    """验证音频不为空"""
-    w = wave.open(path, 'rb')
-    frames = w.readframes(min(w.getnframes(), 5000))
-    w.close()
-    if not frames:
-        return False
-    mx = max(abs(int.from_bytes(frames[i:i+2], 'little', signed=True))
-             for i in range(0, len(frames), 2))
-    return mx > 0
+    """验证音频不为空（整段检查，见 audio_analysis）"""
+    stats = audio_analysis.analyze(path)
+    return stats is not None and not stats.is_silent
 
 def burn_subtitle(src, dst, text):
     """Pillow 烧字幕到图片"""
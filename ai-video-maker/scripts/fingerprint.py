@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Input fingerprints for incremental rebuilds — decide which artifacts are stale.
+
+Every artifact is fingerprinted from exactly the inputs that shape it: page
+text, the config fields the step reads, and content hashes of upstream
+files. The fingerprint is stored with the checkpoint entry; a later run
+redoes a node only when its fingerprint changed. Because upstream files are
+hashed by content, a change propagates down the chain
+(subtitle -> segment -> merge -> bgm) and stops as soon as a rebuilt file
+comes out byte-identical.
+"""
+
+import hashlib
+import os
+import threading
+from dataclasses import asdict
+
+from asset_cache import cache_key
+
+# Config fields each step depends on (anything else may change freely)
+SUBTITLE_FIELDS = [
+    "mode", "style", "font_path", "font_name", "font_size", "outline_width",
+    "box_alpha", "box_padding", "box_radius", "margin_bottom", "line_spacing",
+    "image_shrink", "karaoke", "language",
+]
+ADAPT_FIELDS = ["width", "height", "adapt_strategy"]
+SEGMENT_FIELDS = ["fps", "width", "height", "kb_scale", "buffer", "transition_dur", "crf",
+                  "preset"]
+MERGE_FIELDS = ["transition_dur", "transitions", "fade_in", "fade_out", "crf", "preset",
+                "merge_strategy"]
+# Smart merge cuts segments at their window edges, so these shape the segment too
+SMART_CUT_FIELDS = ["merge_strategy", "transition_dur", "fade_in", "fade_out"]
+BGM_FIELDS = ["file", "volume", "fade_in", "fade_out"]
+
+# Key used in the checkpoint for whole-video steps (merge, bgm)
+FINAL = "final"
+
+# (path, size, mtime_ns) -> sha256, so a file is hashed once per change
+_digests = {}
+_lock = threading.Lock()
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's content ("" if it does not exist)."""
+    try:
+        st = os.stat(path)
+    except (FileNotFoundError, TypeError):
+        return ""
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    with _lock:
+        if memo_key in _digests:
+            return _digests[memo_key]
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _lock:
+        _digests[memo_key] = digest
+    return digest
+
+
+def stamp_path(path: str) -> str:
+    """Sidecar holding the key an artifact in a shared directory was built for."""
+    return path + ".key"
+
+
+def read_stamp(path: str) -> str:
+    """Key recorded next to path ("" if none)."""
+    try:
+        with open(stamp_path(path), encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return ""
+
+
+def write_stamp(path: str, key: str) -> None:
+    tmp = f"{stamp_path(path)}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(key)
+    os.replace(tmp, stamp_path(path))
+
+
+def clear_stamp(path: str) -> None:
+    try:
+        os.unlink(stamp_path(path))
+    except FileNotFoundError:
+        pass
+
+
+def is_fresh(path: str, key: str) -> bool:
+    """True if path exists and was built for key.
+
+    Audio and images live in project-wide directories shared by production,
+    draft and preset runs, each with its own checkpoint; the sidecar keeps
+    their freshness with the file itself, so every run agrees on it.
+    """
+    return os.path.exists(path) and read_stamp(path) == key
+
+
+def pick(dc, names: list) -> dict:
+    """Subset of a config dataclass as a plain dict."""
+    data = asdict(dc)
+    return {name: data[name] for name in names}
+
+
+def subtitles_fingerprint(config, page_cfg, image_path: str, audio_path: str) -> str:
+    """Text + style + source image and how it is adapted to the frame.
+    Dynamic: also narration + audio."""
+    parts = ["subtitles", page_cfg.subtitle, pick(config.subtitle, SUBTITLE_FIELDS),
+             file_digest(image_path), pick(config.video, ADAPT_FIELDS)]
+    if config.subtitle.mode == "dynamic":
+        parts += [page_cfg.narration, file_digest(audio_path)]
+    return cache_key(*parts)
+
+
+def segment_fingerprint(config, page_cfg, image_path: str, audio_path: str,
+                        ass_path: str = None) -> str:
+    """Subtitled image + audio + ASS + encode settings + Ken Burns effect of the page."""
+    parts = ["segments", file_digest(image_path), file_digest(audio_path),
+             file_digest(ass_path), pick(config.video, SEGMENT_FIELDS),
+             (page_cfg.page - 1) % 4]
+    if config.video.merge_strategy == "smart":
+        parts.append(pick(config.video, SMART_CUT_FIELDS))
+    return cache_key(*parts)
+
+
+def merge_fingerprint(config, segment_files: list, durations: list,
+                      audio_files: list = None) -> str:
+    """Ordered segment contents + their durations + transition/fade settings,
+    plus the narration WAVs when the soundtrack is built from them."""
+    return cache_key(
+        "merge", [file_digest(f) for f in segment_files],
+        [round(d, 3) for d in durations], pick(config.video, MERGE_FIELDS),
+        [file_digest(a) for a in audio_files] if audio_files else None,
+    )
+
+
+def render_fingerprint(config, pages: list, bgm_mixed: bool) -> str:
+    """Single-pass render: every page's inputs + encode, merge and (optionally) BGM settings.
+
+    pages: [(page_num, image_path, audio_path, ass_path or None), ...]
+    """
+    return cache_key(
+        "render",
+        [(p, file_digest(img), file_digest(aud), file_digest(ass), (p - 1) % 4)
+         for p, img, aud, ass in pages],
+        pick(config.video, SEGMENT_FIELDS), pick(config.video, MERGE_FIELDS),
+        [file_digest(config.bgm.file), pick(config.bgm, BGM_FIELDS)] if bgm_mixed else None,
+    )
+
+
+def bgm_fingerprint(config, video_path: str) -> str:
+    """Merged video + BGM file + mix settings."""
+    return cache_key(
+        "bgm", file_digest(video_path), file_digest(config.bgm.file),
+        pick(config.bgm, BGM_FIELDS),
+    )
@@ -1,21 +1,36 @@
 #!/usr/bin/env python3
 """Image generation service with provider abstraction."""
 
+import asyncio
 import os
-import time
+import threading
 from abc import ABC, abstractmethod
+from concurrent.futures import Future
 
 from PIL import Image, ImageDraw, ImageFont
 
 from config import ImageGenConfig, VideoConfig
 
 
+def full_prompt(prompt: str, config: ImageGenConfig) -> str:
+    """Page prompt with the global style suffix appended."""
+    if config.style_prompt:
+        return f"{prompt}. {config.style_prompt}"
+    return prompt
+
+
 class ImageProvider(ABC):
+    _sync_runner = None                 # loop for generate_image_with_retry, made on first use
+
     @abstractmethod
     def generate(self, prompt: str, output_path: str) -> bool:
         """Generate image from prompt. Returns True on success."""
         ...
 
+    async def agenerate(self, prompt: str, output_path: str) -> bool:
+        """Async variant. Providers without a native async client run in a thread."""
+        return await asyncio.to_thread(self.generate, prompt, output_path)
+
 
 class GeminiImage(ImageProvider):
     def __init__(self, config: ImageGenConfig):
@@ -29,24 +44,48 @@ class GeminiImage(ImageProvider):
         self.client = genai.Client(api_key=api_key)
         self.types = types
 
-    def generate(self, prompt: str, output_path: str) -> bool:
-        full_prompt = prompt
-        if self.config.style_prompt:
-            full_prompt = f"{prompt}. {self.config.style_prompt}"
+    def _request_config(self):
+        return self.types.GenerateContentConfig(
+            response_modalities=["IMAGE", "TEXT"],
+        )
 
+    @staticmethod
+    def _image_part(response):
+        for part in response.candidates[0].content.parts:
+            if part.inline_data and part.inline_data.mime_type.startswith("image/"):
+                return part
+        return None
+
+    def generate(self, prompt: str, output_path: str) -> bool:
         response = self.client.models.generate_content(
             model=self.config.model,
-            contents=full_prompt,
-            config=self.types.GenerateContentConfig(
-                response_modalities=["IMAGE", "TEXT"],
-            ),
+            contents=full_prompt(prompt, self.config),
+            config=self._request_config(),
         )
-        for part in response.candidates[0].content.parts:
-            if part.inline_data and part.inline_data.mime_type.startswith("image/"):
-                with open(output_path, "wb") as f:
-                    f.write(part.inline_data.data)
-                return True
-        return False
+        part = self._image_part(response)
+        if part is None:
+            return False
+        with open(output_path, "wb") as f:
+            f.write(part.inline_data.data)
+        return True
+
+    async def agenerate(self, prompt: str, output_path: str) -> bool:
+        response = await self.client.aio.models.generate_content(
+            model=self.config.model,
+            contents=full_prompt(prompt, self.config),
+            config=self._request_config(),
+        )
+        part = self._image_part(response)
+        if part is None:
+            return False
+        # Write as soon as this response lands, without blocking the other requests
+        await asyncio.to_thread(_write_bytes, output_path, part.inline_data.data)
+        return True
+
+
+def _write_bytes(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
 
 
 class PillowFallback(ImageProvider):
@@ -96,12 +135,58 @@ def verify_image(path: str, min_size: int = 200_000) -> bool:
         return False
 
 
-def generate_image_with_retry(provider: ImageProvider, prompt: str, output_path: str,
-                               config: ImageGenConfig) -> bool:
+# (cache_dir, max_mb) -> AssetCache, shared by concurrent subtitle nodes
+_adapt_caches = {}
+_adapt_caches_lock = threading.Lock()
+
+
+def _adapt_cache(config: VideoConfig):
+    from asset_cache import AssetCache
+    key = (config.adapt_cache_dir, config.adapt_cache_max_mb)
+    with _adapt_caches_lock:
+        if key not in _adapt_caches:
+            _adapt_caches[key] = AssetCache(config.adapt_cache_dir,
+                                            max_mb=config.adapt_cache_max_mb, ext=".png")
+        return _adapt_caches[key]
+
+
+def normalized_image(src: str, dst: str, config: VideoConfig) -> str:
+    """src adapted to the frame size (video.adapt_strategy), placed at dst.
+
+    Done once per (image content, strategy, size) and kept in
+    video.adapt_cache_dir, so later steps only ever see frame-sized images.
+    Returns src itself when it already has the frame size.
+    """
+    from resolution_presets import adapt
+
+    W, H = config.width, config.height
+    strategy = config.adapt_strategy or "crop_center"
+    with Image.open(src) as img:
+        if img.size == (W, H):
+            return src
+        cache = key = None
+        if config.adapt_cache_dir:
+            from asset_cache import cache_key
+            from fingerprint import file_digest
+            cache = _adapt_cache(config)
+            key = cache_key("adapt", file_digest(src), strategy, W, H)
+            if cache.fetch(key, dst):
+                return dst
+        out = adapt(img, W, H, strategy)
+    tmp = f"{dst}.{os.getpid()}.{threading.get_ident()}.tmp.png"
+    out.save(tmp, compress_level=1)
+    os.replace(tmp, dst)
+    if cache:
+        cache.store(key, dst)
+    return dst
+
+
+async def agenerate_image_with_retry(provider: ImageProvider, prompt: str, output_path: str,
+                                     config: ImageGenConfig) -> bool:
     """Generate image with retry and quality verification."""
     for attempt in range(1, config.max_retries + 1):
         try:
-            success = provider.generate(prompt, output_path)
+            success = await provider.agenerate(prompt, output_path)
             if success and os.path.exists(output_path):
                 # For Pillow fallback, skip size check
                 if config.provider == "pillow_fallback":
@@ -115,13 +200,76 @@ def generate_image_with_retry(provider: ImageProvider, prompt: str, output_path:
             print(f"    Attempt {attempt} failed: {e}")
 
         if attempt < config.max_retries:
-            time.sleep(config.retry_delay)
+            await asyncio.sleep(config.retry_delay)
 
     # Final fallback: generate with Pillow if AI generation failed
     if config.provider != "pillow_fallback":
         print(f"    Falling back to Pillow placeholder...")
         fallback = PillowFallback(config)
-        return fallback.generate(prompt, output_path)
+        return await asyncio.to_thread(fallback.generate, prompt, output_path)
 
     print(f"    FAILED after {config.max_retries} attempts")
     return False
+
+
+class AsyncImageRunner:
+    """Keeps up to `concurrency` image requests in flight on one background event loop.
+
+    Callers on any thread use generate() (blocking) or submit() (returns a
+    concurrent.futures.Future); each request gets the full retry / size check /
+    Pillow fallback treatment of agenerate_image_with_retry.
+
+    Usage:
+        with AsyncImageRunner(provider, config.image_gen, concurrency=4) as runner:
+            futures = [runner.submit(prompt, path) for prompt, path in jobs]
+            results = [f.result() for f in futures]
+    """
+
+    def __init__(self, provider: ImageProvider, config: ImageGenConfig, concurrency: int = 4):
+        self.provider = provider
+        self.config = config
+        self.loop = asyncio.new_event_loop()
+        self._sem = asyncio.Semaphore(max(1, concurrency))
+        self._thread = threading.Thread(target=self.loop.run_forever,
+                                        name="image-aio", daemon=True)
+        self._thread.start()
+
+    async def _run(self, prompt: str, output_path: str) -> bool:
+        async with self._sem:
+            return await agenerate_image_with_retry(self.provider, prompt, output_path, self.config)
+
+    def submit(self, prompt: str, output_path: str) -> Future:
+        return asyncio.run_coroutine_threadsafe(self._run(prompt, output_path), self.loop)
+
+    def generate(self, prompt: str, output_path: str) -> bool:
+        return self.submit(prompt, output_path).result()
+
+    def close(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_sync_runner_lock = threading.Lock()
+
+
+def generate_image_with_retry(provider: ImageProvider, prompt: str, output_path: str,
+                              config: ImageGenConfig) -> bool:
+    """Blocking wrapper around agenerate_image_with_retry.
+
+    Runs on one long-lived AsyncImageRunner loop per provider, so a client
+    bound to its first event loop (Gemini's aio client) always sees that loop.
+    """
+    with _sync_runner_lock:
+        if provider._sync_runner is None:
+            provider._sync_runner = AsyncImageRunner(provider, config)
+        runner = provider._sync_runner
+    future = asyncio.run_coroutine_threadsafe(
+        agenerate_image_with_retry(provider, prompt, output_path, config), runner.loop)
+    return future.result()
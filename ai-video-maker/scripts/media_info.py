@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""Media metadata — one ffprobe per file version, cached on disk across runs.
+
+A file is probed once for everything the pipeline asks about (duration,
+codecs, sample rate, resolution). Results are keyed by (path, size, mtime),
+so a rewritten file is probed again while an unchanged one never is, even
+in a later run. The cache is an append-only JSONL file; the newest record
+for a path wins and the file is compacted on load once stale records pile up.
+Processes sharing the file (e.g. --presets) append and compact under an
+flock on a sidecar .lock file, so a compaction never drops another
+process's records.
+
+WAV files skip ffprobe entirely: their format and length are read from the
+RIFF header, which takes microseconds instead of a process spawn.
+
+Usage:
+    info = media_info.probe("audio/page_01.wav")
+    info.duration, info.sample_rate, info.audio_codec
+    media_info.duration("segments/page_01.mp4")
+"""
+
+import json
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+try:
+    import fcntl
+except ImportError:                         # Windows: no locking, no compaction
+    fcntl = None
+
+import tracing
+
+CACHE_FILE = "~/.cache/ai-video-maker/media_info.jsonl"
+
+
+@dataclass
+class MediaInfo:
+    duration: float = 0.0
+    audio_codec: str = ""
+    video_codec: str = ""
+    sample_rate: int = 0
+    channels: int = 0
+    width: int = 0
+    height: int = 0
+
+
+# (WAVE format tag, bits per sample) -> ffprobe codec name
+_WAV_CODECS = {
+    (1, 8): "pcm_u8", (1, 16): "pcm_s16le", (1, 24): "pcm_s24le", (1, 32): "pcm_s32le",
+    (3, 32): "pcm_f32le", (3, 64): "pcm_f64le",
+}
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+@dataclass
+class WavLayout:
+    """Where a RIFF WAV's samples are and how they are encoded."""
+    format_tag: int                  # 1 = integer PCM, 3 = IEEE float
+    channels: int
+    sample_rate: int
+    byte_rate: int
+    bits: int
+    data_offset: int                 # file offset of the first sample
+    data_size: int                   # bytes of sample data
+
+
+def wav_layout(path: str):
+    """WavLayout from a WAV's RIFF header, or None if it is not one."""
+    try:
+        with open(path, "rb") as f:
+            riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+            if riff != b"RIFF" or wave_id != b"WAVE":
+                return None
+            fmt = None
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    return None
+                chunk_id, size = struct.unpack("<4sI", header)
+                if chunk_id == b"fmt ":
+                    body = f.read(size + (size & 1))
+                    tag, channels, rate, byte_rate, _, bits = struct.unpack("<HHIIHH", body[:16])
+                    if tag == _WAVE_FORMAT_EXTENSIBLE and size >= 26:
+                        tag = struct.unpack("<H", body[24:26])[0]   # sub-format GUID
+                    fmt = (tag, channels, rate, byte_rate, bits)
+                elif chunk_id == b"data":
+                    if fmt is None:
+                        return None
+                    # Streaming writers leave the size unset; the data runs to EOF
+                    available = os.fstat(f.fileno()).st_size - f.tell()
+                    data_size = available if size in (0, 0xFFFFFFFF) else min(size, available)
+                    return WavLayout(*fmt, data_offset=f.tell(), data_size=data_size)
+                else:
+                    f.seek(size + (size & 1), os.SEEK_CUR)     # chunks are word-aligned
+    except (OSError, struct.error):
+        return None
+
+
+def wav_codec(layout: WavLayout):
+    """ffprobe codec name of a PCM layout, or None for compressed payloads."""
+    return _WAV_CODECS.get((layout.format_tag, layout.bits))
+
+
+def wav_info(path: str):
+    """MediaInfo from a PCM WAV's RIFF header, or None if it is not one."""
+    layout = wav_layout(path)
+    codec = wav_codec(layout) if layout else None
+    if codec is None or not layout.byte_rate:
+        return None                         # compressed WAV payloads go to ffprobe
+    return MediaInfo(duration=layout.data_size / layout.byte_rate, audio_codec=codec,
+                     sample_rate=layout.sample_rate, channels=layout.channels)
+
+
+def _ffprobe(path: str):
+    """MediaInfo from ffprobe, or None if the file cannot be probed."""
+    r = tracing.run(
+        ["ffprobe", "-v", "quiet", "-print_format", "json", "-show_format", "-show_streams",
+         path],
+        capture_output=True, text=True,
+    )
+    try:
+        data = json.loads(r.stdout)
+        info = MediaInfo(duration=float(data["format"]["duration"]))
+    except (ValueError, KeyError, TypeError):
+        return None
+    for st in data.get("streams", []):
+        if st.get("codec_type") == "audio" and not info.audio_codec:
+            info.audio_codec = st.get("codec_name", "")
+            info.sample_rate = int(st.get("sample_rate") or 0)
+            info.channels = int(st.get("channels") or 0)
+        elif st.get("codec_type") == "video" and not info.video_codec:
+            info.video_codec = st.get("codec_name", "")
+            info.width = int(st.get("width") or 0)
+            info.height = int(st.get("height") or 0)
+    return info
+
+
+class MediaInfoCache:
+    """(path, size, mtime) -> MediaInfo, in memory and in a JSONL file."""
+
+    def __init__(self, cache_file: str = CACHE_FILE):
+        self.cache_file = os.path.expanduser(cache_file) if cache_file else ""
+        self._entries = None                # abspath -> (size, mtime_ns, MediaInfo)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock on the cache file across processes (no-op without fcntl)."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.cache_file + ".lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read(self) -> tuple[dict, int]:
+        """(newest record per path, line count) from the cache file."""
+        entries, lines = {}, 0
+        if not os.path.exists(self.cache_file):
+            return entries, lines
+        with open(self.cache_file, encoding="utf-8") as f:
+            for line in f:
+                lines += 1
+                try:
+                    rec = json.loads(line)
+                    entries[rec["path"]] = (rec["size"], rec["mtime_ns"],
+                                            MediaInfo(**rec["info"]))
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    continue                # torn or foreign line
+        return entries, lines
+
+    def _load(self) -> None:
+        self._entries = {}
+        if not self.cache_file:
+            return
+        self._entries, lines = self._read()
+        if lines > 2 * len(self._entries) + 100 and fcntl is not None:
+            try:
+                self._compact()
+            except OSError:
+                pass                        # the cache is an optimization only
+
+    def _record(self, path: str, size: int, mtime_ns: int, info: MediaInfo) -> str:
+        return json.dumps({"path": path, "size": size, "mtime_ns": mtime_ns,
+                           "info": asdict(info)}, ensure_ascii=False) + "\n"
+
+    def _compact(self) -> None:
+        # Re-read under the lock: other processes may have appended since _load
+        with self._file_lock():
+            self._entries, _ = self._read()
+            tmp = f"{self.cache_file}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for path, (size, mtime_ns, info) in self._entries.items():
+                    f.write(self._record(path, size, mtime_ns, info))
+            os.replace(tmp, self.cache_file)
+
+    def _append(self, line: str) -> None:
+        if not self.cache_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            with self._file_lock(), open(self.cache_file, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError:
+            pass                            # the cache is an optimization only
+
+    def probe(self, path: str):
+        """MediaInfo for path, or None if it is missing or not a media file."""
+        try:
+            st = os.stat(path)
+        except (FileNotFoundError, TypeError):
+            return None
+        if path.lower().endswith(".wav"):
+            info = wav_info(path)
+            if info is not None:
+                return info
+        key = os.path.abspath(path)
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            hit = self._entries.get(key)
+        if hit and hit[:2] == (st.st_size, st.st_mtime_ns):
+            return hit[2]
+
+        info = _ffprobe(path)
+        if info is None:
+            return None
+        with self._lock:
+            self._entries[key] = (st.st_size, st.st_mtime_ns, info)
+            self._append(self._record(key, st.st_size, st.st_mtime_ns, info))
+        return info
+
+
+_cache = MediaInfoCache()
+
+
+def probe(path: str):
+    """MediaInfo for path (cached), or None if it cannot be probed."""
+    return _cache.probe(path)
+
+
+def duration(path: str) -> float:
+    """Duration in seconds. Raises ValueError if path cannot be probed."""
+    info = _cache.probe(path)
+    if info is None:
+        raise ValueError(f"Cannot probe media file: {path}")
+    return info.duration
@@ -23,116 +23,398 @@ Usage:
 
     # Force re-run (ignore checkpoint)
     python3 pipeline.py --config project.yaml --no-resume
+
+    # Fast low-resolution preview (outputs in project_dir/draft/)
+    python3 pipeline.py --config project.yaml --draft
+
+    # Legacy step-at-a-time execution (no per-page overlap)
+    python3 pipeline.py --config project.yaml --scheduler steps
 """
 
 import argparse
+import functools
 import os
+import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 # Add script directory to path for local imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from config import load_config, resolve_paths, ensure_dirs
+from config import (apply_draft_profile, apply_resolution_preset, load_config, resolve_paths,
+                    ensure_dirs)
+import tracing
 
 
 ALL_STEPS = ["tts", "images", "subtitles", "segments", "merge", "bgm"]
+_SEGMENT_NAME = re.compile(r"^page_(\d+)\.mp4$")
+
+
+def _log(msg: str) -> None:
+    """Print one whole line at a time so concurrent page workers don't interleave."""
+    sys.stdout.write(msg + "\n")
+    sys.stdout.flush()
+
+
+def _selected_pages(config, page_nums=None) -> list:
+    """Pages to process, honouring the --pages filter."""
+    return [pc for pc in config.pages if not page_nums or pc.page in page_nums]
+
+
+def _page_span(step: str):
+    """Trace a per-page function as one 'page NN step' span."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(config, paths, page_cfg, *args, **kwargs):
+            p = page_cfg.page
+            with tracing.span(f"page {p:02d} {step}", cat="page", page=p, step=step):
+                ok = func(config, paths, page_cfg, *args, **kwargs)
+                tracing.annotate(ok=bool(ok))
+                return ok
+        return wrapper
+    return decorator
+
+
+@_page_span("tts")
+def _tts_page(config, paths, page_cfg, checkpoint, provider, limiter=None,
+              cache=None) -> bool:
+    """Generate TTS audio for a single page.
+
+    The audio is keyed by (provider, voice, speed, narration) and the key is
+    stamped next to the WAV: audio without a matching stamp (edited
+    narration, or made before stamps) is re-synthesized, and identical
+    narrations are served from the shared cache. The key does not depend on
+    the draft profile or preset, so every run may write the shared audio.
+    """
+    from asset_cache import cache_key
+    from fingerprint import clear_stamp, is_fresh, read_stamp, write_stamp
+    from tts_service import generate_tts_with_retry
+
+    p = page_cfg.page
+    key = cache_key("tts", config.tts.provider, config.tts.voice, config.tts.speed,
+                    page_cfg.narration)
+    output = os.path.join(paths["audio_dir"], f"page_{p:02d}.wav")
+
+    if is_fresh(output, key):
+        _log(f"  Page {p:02d} [tts]: up to date, skipping")
+        if checkpoint:
+            checkpoint.mark_completed(p, "tts", fingerprint=key)
+        return True
+
+    stale = os.path.exists(output) and read_stamp(output) != ""
+    # A half-written file must never inherit a matching stamp
+    clear_stamp(output)
+    if cache and cache.fetch(key, output):
+        write_stamp(output, key)
+        _log(f"  Page {p:02d} [tts]: cache hit")
+        if checkpoint:
+            checkpoint.mark_completed(p, "tts", fingerprint=key)
+        return True
+
+    # Never write through a hardlink into the shared cache
+    if os.path.exists(output):
+        os.unlink(output)
+
+    if stale:
+        _log(f"  Page {p:02d} [tts]: narration changed, regenerating ({len(page_cfg.narration)} chars)...")
+    else:
+        _log(f"  Page {p:02d} [tts]: generating ({len(page_cfg.narration)} chars)...")
+    ok = generate_tts_with_retry(provider, page_cfg.narration, output, config.tts,
+                                 limiter=limiter)
+    if ok:
+        _log(f"  Page {p:02d} [tts]: done")
+        tracing.record_output(output)
+        write_stamp(output, key)
+        if cache:
+            cache.store(key, output)
+        if checkpoint:
+            checkpoint.mark_completed(p, "tts", fingerprint=key)
+    else:
+        _log(f"  Page {p:02d} [tts]: FAILED")
+        if checkpoint:
+            checkpoint.mark_failed(p, "tts", "TTS generation failed")
+    return ok
+
 
+def _tts_cache(config):
+    """Cross-project TTS audio cache, or None if tts.cache_dir is empty."""
+    if not config.tts.cache_dir:
+        return None
+    from asset_cache import AssetCache
+    return AssetCache(config.tts.cache_dir, max_mb=config.tts.cache_max_mb, ext=".wav")
 
+
+def _tts_limiter(config):
+    """Token bucket shared by all TTS workers of a run."""
+    from retry import TokenBucket
+    return TokenBucket.per_minute(config.tts.requests_per_minute,
+                                  burst=max(1, config.tts.concurrency))
+
+
+@tracing.traced("step tts", cat="step", step="tts")
 def step_tts(config, paths, page_nums=None, checkpoint=None):
     """Step 1: Generate TTS audio for each page."""
-    from tts_service import create_tts_provider, generate_tts_with_retry
+    from tts_service import create_tts_provider
 
     print("\n" + "=" * 60)
     print("[TTS] Generating voiceover audio...")
     print("=" * 60)
 
     provider = create_tts_provider(config.tts)
-    success_count = 0
+    limiter = _tts_limiter(config)
+    cache = _tts_cache(config)
+    workers = max(1, config.tts.concurrency)
+
+    # Pages finish out of order; checkpoint writes are serialized internally
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(
+            lambda pc: _tts_page(config, paths, pc, checkpoint, provider, limiter, cache),
+            _selected_pages(config, page_nums),
+        ))
+    success_count = sum(1 for ok in results if ok)
 
-    for page_cfg in config.pages:
-        p = page_cfg.page
-        if page_nums and p not in page_nums:
-            continue
+    print(f"\n[TTS] {success_count}/{len(config.pages)} pages generated")
+    if cache:
+        print(f"[TTS] Cache: {cache.report()}")
+    return success_count > 0
 
-        # Check checkpoint
-        if checkpoint and checkpoint.is_completed(p, "tts"):
-            print(f"  Page {p:02d}: checkpoint says done, skipping")
-            success_count += 1
-            continue
 
-        output = os.path.join(paths["audio_dir"], f"page_{p:02d}.wav")
-        if os.path.exists(output):
-            print(f"  Page {p:02d}: already exists, skipping")
-            success_count += 1
-            if checkpoint:
-                checkpoint.mark_completed(p, "tts")
-            continue
+def _image_key(config, page_cfg) -> str:
+    """Key of a page image: (model, full prompt incl. style suffix).
+
+    Only Pillow placeholders are drawn at the frame size; AI images do not
+    depend on it, so drafts and presets share them with production.
+    """
+    from asset_cache import cache_key
+    from image_service import full_prompt
+
+    parts = ["image", config.image_gen.model,
+             full_prompt(page_cfg.image_prompt, config.image_gen)]
+    if config.image_gen.provider == "pillow_fallback":
+        parts += [config.video.width, config.video.height]
+    return cache_key(*parts)
+
+
+def _page_image(paths, p: int) -> str:
+    """Source image of a page: a draft's own copy, else the shared png or jpg."""
+    candidates = [os.path.join(paths["images_dir"], f"page_{p:02d}.png"),
+                  os.path.join(paths["images_dir"], f"page_{p:02d}.jpg")]
+    if "draft_images_dir" in paths:
+        candidates.insert(0, os.path.join(paths["draft_images_dir"], f"page_{p:02d}.png"))
+    return next((c for c in candidates if os.path.exists(c)), candidates[-2])
+
+
+@_page_span("images")
+def _images_page(config, paths, page_cfg, checkpoint, runner, cache=None) -> bool:
+    """Generate the AI image for a single page through the shared async runner.
+
+    The key (see _image_key) is stamped next to the image: an image without
+    a matching stamp (changed prompt or style, or made before stamps) is
+    regenerated, and a prompt reused in another video is served from the
+    shared cache. Draft runs never write the shared images/ directory: they
+    use a fresh shared image or generate their own under draft/images/.
+    """
+    from fingerprint import clear_stamp, is_fresh, read_stamp, write_stamp
+    from image_service import verify_image
+
+    p = page_cfg.page
+    shared = os.path.join(paths["images_dir"], f"page_{p:02d}.png")
+    if not page_cfg.image_prompt:
+        if os.path.exists(_page_image(paths, p)):
+            _log(f"  Page {p:02d} [images]: no image_prompt, using the existing image")
+            return True
+        _log(f"  Page {p:02d} [images]: no image_prompt, skipping")
+        return False
 
-        print(f"  Page {p:02d}: generating ({len(page_cfg.narration)} chars)...")
-        ok = generate_tts_with_retry(provider, page_cfg.narration, output, config.tts)
-        if ok:
-            print(f"  Page {p:02d}: done")
-            success_count += 1
-            if checkpoint:
-                checkpoint.mark_completed(p, "tts")
-        else:
-            print(f"  Page {p:02d}: FAILED")
+    key = _image_key(config, page_cfg)
+    output = shared
+    if "draft_images_dir" in paths:
+        output = os.path.join(paths["draft_images_dir"], f"page_{p:02d}.png")
+        if is_fresh(shared, key) and os.path.exists(output):
+            os.unlink(output)               # production caught up; drop the draft copy
+
+    for path in (shared, output):
+        if is_fresh(path, key):
+            _log(f"  Page {p:02d} [images]: up to date, skipping")
             if checkpoint:
-                checkpoint.mark_failed(p, "tts", "TTS generation failed")
+                checkpoint.mark_completed(p, "images", fingerprint=key)
+            return True
+
+    stale = os.path.exists(output) and read_stamp(output) != ""
+    # A half-written file must never inherit a matching stamp
+    clear_stamp(output)
+    if cache and cache.fetch(key, output):
+        write_stamp(output, key)
+        _log(f"  Page {p:02d} [images]: cache hit")
+        if checkpoint:
+            checkpoint.mark_completed(p, "images", fingerprint=key)
+        return True
 
-    print(f"\n[TTS] {success_count}/{len(config.pages)} pages generated")
-    return success_count > 0
+    # Never write through a hardlink into the shared cache
+    if os.path.exists(output):
+        os.unlink(output)
+
+    _log(f"  Page {p:02d} [images]: {'prompt changed, regenerating' if stale else 'generating'}...")
+    ok = runner.generate(page_cfg.image_prompt, output)
+    if ok:
+        _log(f"  Page {p:02d} [images]: done")
+        tracing.record_output(output)
+        placeholder = config.image_gen.provider == "pillow_fallback"
+        real = placeholder or verify_image(output)
+        # A Pillow fallback standing in for a failed AI image is retried next run
+        if real:
+            write_stamp(output, key)
+        # Only real AI images are worth sharing, never Pillow placeholders
+        if cache and not placeholder and real:
+            cache.store(key, output)
+        if checkpoint:
+            checkpoint.mark_completed(p, "images", fingerprint=key)
+    else:
+        _log(f"  Page {p:02d} [images]: FAILED")
+        if checkpoint:
+            checkpoint.mark_failed(p, "images", "Image generation failed")
+    return ok
+
+
+def _image_cache(config):
+    """Cross-project image cache, or None if image_gen.cache_dir is empty."""
+    if not config.image_gen.cache_dir:
+        return None
+    from asset_cache import AssetCache
+    return AssetCache(config.image_gen.cache_dir, max_mb=config.image_gen.cache_max_mb,
+                      ext=".png")
 
 
+def _image_runner(config):
+    """Async image runner keeping image_gen.concurrency requests in flight."""
+    from image_service import AsyncImageRunner, create_image_provider
+    provider = create_image_provider(config.image_gen, config.video)
+    return AsyncImageRunner(provider, config.image_gen,
+                            concurrency=config.image_gen.concurrency)
+
+
+@tracing.traced("step images", cat="step", step="images")
 def step_images(config, paths, page_nums=None, checkpoint=None):
     """Step 2: Generate AI images for each page."""
-    from image_service import create_image_provider, generate_image_with_retry
-
     print("\n" + "=" * 60)
     print("[IMAGES] Generating images...")
     print("=" * 60)
 
-    provider = create_image_provider(config.image_gen, config.video)
-    success_count = 0
+    cache = _image_cache(config)
+    workers = max(1, config.image_gen.concurrency)
+    with _image_runner(config) as runner, ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(
+            lambda pc: _images_page(config, paths, pc, checkpoint, runner, cache),
+            _selected_pages(config, page_nums),
+        ))
+    success_count = sum(1 for ok in results if ok)
 
-    for page_cfg in config.pages:
-        p = page_cfg.page
-        if page_nums and p not in page_nums:
-            continue
+    print(f"\n[IMAGES] {success_count}/{len(config.pages)} pages generated")
+    if cache:
+        print(f"[IMAGES] Cache: {cache.report()}")
+    return success_count > 0
 
-        if checkpoint and checkpoint.is_completed(p, "images"):
-            print(f"  Page {p:02d}: checkpoint says done, skipping")
-            success_count += 1
-            continue
 
-        output = os.path.join(paths["images_dir"], f"page_{p:02d}.png")
-        if os.path.exists(output):
-            print(f"  Page {p:02d}: already exists, skipping")
-            success_count += 1
-            if checkpoint:
-                checkpoint.mark_completed(p, "images")
-            continue
+@_page_span("subtitles")
+def _subtitles_page(config, paths, page_cfg, checkpoint, burner=None) -> bool:
+    """Process the subtitle of a single page (static burn or dynamic ASS).
 
-        if not page_cfg.image_prompt:
-            print(f"  Page {p:02d}: no image_prompt, skipping")
-            continue
+    In static mode the burn runs on the StaticBurnPool if one is given.
+    """
+    from fingerprint import subtitles_fingerprint
+
+    p = page_cfg.page
+    is_dynamic = config.subtitle.mode == "dynamic"
+
+    src = _page_image(paths, p)
+    aud = os.path.join(paths["audio_dir"], f"page_{p:02d}.wav")
+    dst = os.path.join(paths["images_sub_dir"], f"page_{p:02d}.png")
+    ass_out = os.path.join(paths["subtitles_dir"], f"page_{p:02d}.ass")
+
+    # Up to date only if the output exists and was built from the same inputs
+    fp = subtitles_fingerprint(config, page_cfg, src, aud)
+    output = ass_out if is_dynamic else dst
+    if (checkpoint and checkpoint.is_completed(p, "subtitles", fingerprint=fp)
+            and os.path.exists(output)):
+        _log(f"  Page {p:02d} [subtitles]: checkpoint says done, skipping")
+        return True
+
+    if os.path.exists(src):
+        # Adapt to the frame size first, so nothing downstream sees the full-size original
+        from image_service import normalized_image
+        src = normalized_image(src, os.path.join(paths["normalized_images_dir"],
+                                                 f"page_{p:02d}.png"), config.video)
 
-        print(f"  Page {p:02d}: generating...")
-        ok = generate_image_with_retry(provider, page_cfg.image_prompt, output, config.image_gen)
+    if is_dynamic:
+        # Dynamic mode: generate ASS subtitle file
+        if not os.path.exists(aud):
+            _log(f"  Page {p:02d} [subtitles]: no audio found for alignment")
+            return False
+
+        if not page_cfg.subtitle:
+            _log(f"  Page {p:02d} [subtitles]: no subtitle text, skipping")
+            return False
+
+        # Copy original image to images_sub (no burn)
+        if os.path.exists(src):
+            from shutil import copy2
+            copy2(src, dst)
+
+        # Generate ASS
+        from subtitle_service import generate_dynamic_subtitle
+        _log(f"  Page {p:02d} [subtitles]: aligning...")
+        ok = generate_dynamic_subtitle(
+            audio_path=aud,
+            narration_text=page_cfg.narration,
+            subtitle_text=page_cfg.subtitle,
+            ass_output_path=ass_out,
+            config=config.subtitle,
+            video_width=config.video.width,
+            video_height=config.video.height,
+        )
         if ok:
-            print(f"  Page {p:02d}: done")
-            success_count += 1
+            _log(f"  Page {p:02d} [subtitles]: done ({ass_out})")
+            tracing.record_output(ass_out)
             if checkpoint:
-                checkpoint.mark_completed(p, "images")
+                checkpoint.mark_completed(p, "subtitles", fingerprint=fp)
         else:
-            print(f"  Page {p:02d}: FAILED")
+            _log(f"  Page {p:02d} [subtitles]: FAILED")
             if checkpoint:
-                checkpoint.mark_failed(p, "images", "Image generation failed")
+                checkpoint.mark_failed(p, "subtitles", "ASS generation failed")
+        return ok
 
-    print(f"\n[IMAGES] {success_count}/{len(config.pages)} pages generated")
-    return success_count > 0
+    # Static mode: burn subtitle to image
+    if not os.path.exists(src):
+        _log(f"  Page {p:02d} [subtitles]: no source image found")
+        return False
 
+    if not page_cfg.subtitle:
+        from shutil import copy2
+        copy2(src, dst)
+        _log(f"  Page {p:02d} [subtitles]: no subtitle, copied original")
+        if checkpoint:
+            checkpoint.mark_completed(p, "subtitles", fingerprint=fp)
+        return True
 
+    if burner:
+        burner.submit(src, dst, page_cfg.subtitle).result()
+    else:
+        from subtitle_service import burn_subtitle
+        burn_subtitle(src, dst, page_cfg.subtitle, config.subtitle)
+    _log(f"  Page {p:02d} [subtitles]: done")
+    tracing.record_output(dst)
+    if checkpoint:
+        checkpoint.mark_completed(p, "subtitles", fingerprint=fp)
+    return True
+
+
+def _burn_pool(config, jobs: int):
+    """Process pool for static subtitle burning, sized for the frame size."""
+    from subtitle_service import StaticBurnPool
+    return StaticBurnPool(config.subtitle, config.video.width, config.video.height, jobs)
+
+
+@tracing.traced("step subtitles", cat="step", step="subtitles")
 def step_subtitles(config, paths, page_nums=None, checkpoint=None):
     """Step 3: Process subtitles — static (burn to image) or dynamic (generate ASS)."""
 
@@ -145,196 +427,256 @@ def step_subtitles(config, paths, page_nums=None, checkpoint=None):
         print("[SUBTITLES] Burning subtitles to images...")
     print("=" * 60)
 
-    success_count = 0
-
-    for page_cfg in config.pages:
-        p = page_cfg.page
-        if page_nums and p not in page_nums:
-            continue
-
-        if checkpoint and checkpoint.is_completed(p, "subtitles"):
-            print(f"  Page {p:02d}: checkpoint says done, skipping")
-            success_count += 1
-            continue
-
-        # Find source image (png or jpg)
-        src = os.path.join(paths["images_dir"], f"page_{p:02d}.png")
-        if not os.path.exists(src):
-            src = os.path.join(paths["images_dir"], f"page_{p:02d}.jpg")
-
-        if is_dynamic:
-            # Dynamic mode: generate ASS subtitle file
-            aud = os.path.join(paths["audio_dir"], f"page_{p:02d}.wav")
-            ass_out = os.path.join(paths["subtitles_dir"], f"page_{p:02d}.ass")
-
-            if not os.path.exists(aud):
-                print(f"  Page {p:02d}: no audio found for alignment")
-                continue
-
-            if not page_cfg.subtitle:
-                print(f"  Page {p:02d}: no subtitle text, skipping")
-                continue
-
-            # Copy original image to images_sub (no burn)
-            dst = os.path.join(paths["images_sub_dir"], f"page_{p:02d}.png")
-            if os.path.exists(src):
-                from shutil import copy2
-                copy2(src, dst)
-
-            # Generate ASS
-            from subtitle_service import generate_dynamic_subtitle
-            print(f"  Page {p:02d}: aligning...")
-            ok = generate_dynamic_subtitle(
-                audio_path=aud,
-                narration_text=page_cfg.narration,
-                subtitle_text=page_cfg.subtitle,
-                ass_output_path=ass_out,
-                config=config.subtitle,
-                video_width=config.video.width,
-                video_height=config.video.height,
-            )
-            if ok:
-                print(f"  Page {p:02d}: done ({ass_out})")
-                success_count += 1
-                if checkpoint:
-                    checkpoint.mark_completed(p, "subtitles")
-            else:
-                print(f"  Page {p:02d}: FAILED")
-                if checkpoint:
-                    checkpoint.mark_failed(p, "subtitles", "ASS generation failed")
-        else:
-            # Static mode: burn subtitle to image
-            dst = os.path.join(paths["images_sub_dir"], f"page_{p:02d}.png")
-
-            if not os.path.exists(src):
-                print(f"  Page {p:02d}: no source image found")
-                continue
-
-            if not page_cfg.subtitle:
-                from shutil import copy2
-                copy2(src, dst)
-                print(f"  Page {p:02d}: no subtitle, copied original")
-                success_count += 1
-                if checkpoint:
-                    checkpoint.mark_completed(p, "subtitles")
-                continue
-
-            from subtitle_service import burn_subtitle
-            burn_subtitle(src, dst, page_cfg.subtitle, config.subtitle)
-            print(f"  Page {p:02d}: done")
-            success_count += 1
-            if checkpoint:
-                checkpoint.mark_completed(p, "subtitles")
+    pages = _selected_pages(config, page_nums)
+    if is_dynamic:
+        results = [_subtitles_page(config, paths, pc, checkpoint) for pc in pages]
+    else:
+        # Static burns are CPU-bound Pillow work: spread pages across processes
+        with _burn_pool(config, len(pages)) as burner, \
+                ThreadPoolExecutor(max_workers=burner.workers) as pool:
+            results = list(pool.map(
+                lambda pc: _subtitles_page(config, paths, pc, checkpoint, burner),
+                pages,
+            ))
+    success_count = sum(1 for ok in results if ok)
 
     print(f"\n[SUBTITLES] {success_count}/{len(config.pages)} pages processed")
     return success_count > 0
 
 
-def step_segments(config, paths, page_nums=None, checkpoint=None):
-    """Step 4: Create per-page video segments."""
+@_page_span("segments")
+def _segments_page(config, paths, page_cfg, checkpoint, threads: int = 0) -> bool:
+    """Create the video segment of a single page and record it for merge."""
+    from fingerprint import segment_fingerprint
     from tts_service import verify_audio
-    from video_service import create_segment
+    from video_service import create_segment, segment_duration
 
+    p = page_cfg.page
     is_dynamic = config.subtitle.mode == "dynamic"
 
-    print("\n" + "=" * 60)
-    print("[SEGMENTS] Creating video segments...")
-    print("=" * 60)
+    img = os.path.join(paths["images_sub_dir"], f"page_{p:02d}.png")
+    aud = os.path.join(paths["audio_dir"], f"page_{p:02d}.wav")
+    seg = os.path.join(paths["segments_dir"], f"page_{p:02d}.mp4")
 
-    seg_files = []
-    durations = []
+    # Check for ASS subtitle (dynamic mode)
+    ass_path = None
+    if is_dynamic:
+        ass_candidate = os.path.join(paths["subtitles_dir"], f"page_{p:02d}.ass")
+        if os.path.exists(ass_candidate):
+            ass_path = ass_candidate
+
+    # Reuse a segment only if it was completed from exactly these inputs; a
+    # missing or failed record means the file (if any) cannot be trusted
+    fp = segment_fingerprint(config, page_cfg, img, aud, ass_path)
+    stale = checkpoint and checkpoint.is_stale(p, "segments", fp)
+    if (checkpoint and checkpoint.is_completed(p, "segments", fingerprint=fp)
+            and os.path.exists(seg)):
+        # Same length create_segment used, read from the WAV header
+        dur = segment_duration(aud, config.video)
+        _cache.setdefault("segments", {})[p] = (seg, dur)
+        _log(f"  Page {p:02d} [segments]: already exists ({dur:.1f}s)")
+        if checkpoint:
+            checkpoint.mark_completed(p, "segments", fingerprint=fp)
+        return True
 
-    for page_cfg in config.pages:
-        p = page_cfg.page
-        if page_nums and p not in page_nums:
-            continue
+    if not os.path.exists(img) or not os.path.exists(aud):
+        _log(f"  Page {p:02d} [segments]: missing image or audio")
+        return False
 
-        img = os.path.join(paths["images_sub_dir"], f"page_{p:02d}.png")
-        aud = os.path.join(paths["audio_dir"], f"page_{p:02d}.wav")
-        seg = os.path.join(paths["segments_dir"], f"page_{p:02d}.mp4")
-
-        # Check if segment already exists (checkpoint or file)
-        if os.path.exists(seg):
-            from video_service import get_audio_duration
-            dur = get_audio_duration(seg)
-            seg_files.append(seg)
-            durations.append(dur)
-            print(f"  Page {p:02d}: already exists ({dur:.1f}s)")
-            if checkpoint:
-                checkpoint.mark_completed(p, "segments")
-            continue
+    if not verify_audio(aud):
+        _log(f"  Page {p:02d} [segments]: audio is SILENT, skipping")
+        return False
 
-        if not os.path.exists(img) or not os.path.exists(aud):
-            print(f"  Page {p:02d}: missing image or audio")
-            continue
+    _log(f"  Page {p:02d} [segments]: {'inputs changed, re-encoding' if stale else 'creating segment'}...")
+    ok, dur = create_segment(p, img, aud, seg, config.video, ass_path=ass_path,
+                             threads=threads)
+    if ok:
+        tracing.record_output(seg)
+        _cache.setdefault("segments", {})[p] = (seg, dur)
+        _log(f"  Page {p:02d} [segments]: done ({dur:.1f}s)")
+        if checkpoint:
+            checkpoint.mark_completed(p, "segments", fingerprint=fp)
+    else:
+        _log(f"  Page {p:02d} [segments]: FAILED")
+        if checkpoint:
+            checkpoint.mark_failed(p, "segments", "Segment creation failed")
+    return ok
 
-        if not verify_audio(aud):
-            print(f"  Page {p:02d}: audio is SILENT, skipping")
-            continue
 
-        # Check for ASS subtitle (dynamic mode)
-        ass_path = None
-        if is_dynamic:
-            ass_candidate = os.path.join(paths["subtitles_dir"], f"page_{p:02d}.ass")
-            if os.path.exists(ass_candidate):
-                ass_path = ass_candidate
+def _print_timeline(config, paths, pages) -> None:
+    """Planned video length, once every page's narration exists."""
+    from video_service import plan_timeline
+
+    audio = [os.path.join(paths["audio_dir"], f"page_{pc.page:02d}.wav") for pc in pages]
+    if all(os.path.exists(a) for a in audio):
+        _, _, total = plan_timeline(audio, config.video)
+        print(f"  Timeline: {len(pages)} pages, {total:.1f}s")
 
-        print(f"  Page {p:02d}: creating segment...", end=" ")
-        ok, dur = create_segment(p, img, aud, seg, config.video, ass_path=ass_path)
-        if ok:
-            seg_files.append(seg)
-            durations.append(dur)
-            print(f"({dur:.1f}s)")
-            if checkpoint:
-                checkpoint.mark_completed(p, "segments")
-        else:
-            print("FAILED")
-            if checkpoint:
-                checkpoint.mark_failed(p, "segments", "Segment creation failed")
 
-    # Store for merge step
-    _cache["seg_files"] = seg_files
-    _cache["durations"] = durations
+@tracing.traced("step segments", cat="step", step="segments")
+def step_segments(config, paths, page_nums=None, checkpoint=None):
+    """Step 4: Create per-page video segments."""
+    print("\n" + "=" * 60)
+    print("[SEGMENTS] Creating video segments...")
+    print("=" * 60)
 
-    print(f"\n[SEGMENTS] {len(seg_files)}/{len(config.pages)} segments created")
-    return len(seg_files) >= 2
+    if config.video.render_mode == "single_pass":
+        print("  single_pass render mode: pages are encoded in the merge graph, skipping")
+        return True
 
+    from video_service import encode_budget
 
+    pages = _selected_pages(config, page_nums)
+    jobs, threads = encode_budget(config.video, len(pages))
+    print(f"  {jobs} parallel encodes x {threads} threads")
+    _print_timeline(config, paths, pages)
+
+    # Results land in _cache by page number; merge reads them back in page order
+    _cache["segments"] = {}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        list(pool.map(
+            lambda pc: _segments_page(config, paths, pc, checkpoint, threads),
+            pages,
+        ))
+
+    seg_count = len(_cache["segments"])
+    print(f"\n[SEGMENTS] {seg_count}/{len(config.pages)} segments created")
+    return seg_count >= 2
+
+
+@tracing.traced("step merge", cat="step", step="merge")
 def step_merge(config, paths, page_nums=None, checkpoint=None):
     """Step 5: Merge all segments with transitions."""
+    from fingerprint import FINAL, bgm_fingerprint, merge_fingerprint
     from video_service import merge_segments
 
+    if config.video.render_mode == "single_pass":
+        return _render_single_pass(config, paths, checkpoint)
+
     print("\n" + "=" * 60)
     print("[MERGE] Merging segments into final video...")
     print("=" * 60)
 
-    # Use cached segments or discover from directory
-    seg_files = _cache.get("seg_files")
-    durations = _cache.get("durations")
+    # Use cached segments (in page order) or discover from directory
+    done = _cache.get("segments") or {}
+    page_order = [pc.page for pc in config.pages if pc.page in done]
+    seg_files = [done[p][0] for p in page_order]
+    durations = [done[p][1] for p in page_order]
 
     if not seg_files:
         # Discover segments from directory
         from video_service import get_audio_duration
         seg_dir = paths["segments_dir"]
-        files = sorted([
-            f for f in os.listdir(seg_dir)
-            if f.startswith("page_") and f.endswith(".mp4")
-        ])
-        seg_files = [os.path.join(seg_dir, f) for f in files]
+        # Only page_NN.mp4; skips backups and in-flight encoder temp files
+        found = sorted(
+            (int(m.group(1)), f) for f in os.listdir(seg_dir)
+            if (m := _SEGMENT_NAME.match(f))
+        )
+        page_order = [n for n, _ in found]
+        seg_files = [os.path.join(seg_dir, f) for _, f in found]
         durations = [get_audio_duration(f) for f in seg_files]
 
+    # The soundtrack is rebuilt from the narration WAVs when they are all there
+    audio_files = [os.path.join(paths["audio_dir"], f"page_{p:02d}.wav") for p in page_order]
+    if not all(os.path.exists(a) for a in audio_files):
+        audio_files = None
+
     if len(seg_files) < 2:
         print("  Not enough segments to merge (need >= 2)")
         return False
 
-    print(f"  Merging {len(seg_files)} segments...")
-    ok = merge_segments(seg_files, durations, paths["output_path"], config.video)
+    fp = merge_fingerprint(config, seg_files, durations, audio_files)
+    if (checkpoint and checkpoint.is_completed(FINAL, "merge", fingerprint=fp)
+            and os.path.exists(paths["output_path"])):
+        print(f"  Up to date ({len(seg_files)} segments unchanged), skipping")
+        return True
+
+    # BGM is mixed in the same encode; step_bgm only remixes if this did not happen
+    bgm_output = None
+    if _mix_bgm(config):
+        bgm_output = os.path.join(paths["output_dir"], "final_with_bgm.mp4")
+        if os.path.exists(bgm_output):
+            os.unlink(bgm_output)
+
+    print(f"  Merging {len(seg_files)} segments{' with BGM' if bgm_output else ''}...")
+    ok = merge_segments(seg_files, durations, paths["output_path"], config.video,
+                        audio_files=audio_files, bgm=config.bgm, bgm_output=bgm_output)
 
     if ok:
         print(f"\n[MERGE] Success: {paths['output_path']}")
+        if checkpoint:
+            checkpoint.mark_completed(FINAL, "merge", fingerprint=fp)
+            if bgm_output and os.path.exists(bgm_output):
+                checkpoint.mark_completed(
+                    FINAL, "bgm", fingerprint=bgm_fingerprint(config, paths["output_path"]))
+    elif checkpoint:
+        checkpoint.mark_failed(FINAL, "merge", "Merge failed")
     return ok
 
 
+def _mix_bgm(config) -> bool:
+    """Whether merge mixes BGM into its own encode (BGM enabled and the file exists)."""
+    return bool(config.bgm.enabled and config.bgm.file and os.path.exists(config.bgm.file))
+
+
+def _final_video(config, paths) -> str:
+    """Path of the finished video that validation should check."""
+    if config.video.render_mode == "single_pass" and _mix_bgm(config):
+        return os.path.join(paths["output_dir"], "final_with_bgm.mp4")
+    return paths["output_path"]
+
+
+def _render_single_pass(config, paths, checkpoint=None) -> bool:
+    """Merge step in single_pass mode: stills + WAVs -> final video in one encode."""
+    from fingerprint import FINAL, render_fingerprint
+    from tts_service import verify_audio
+    from video_service import render_single_pass
+
+    print("\n" + "=" * 60)
+    print("[MERGE] Rendering final video in a single pass...")
+    print("=" * 60)
+
+    is_dynamic = config.subtitle.mode == "dynamic"
+    pages = []
+    for pc in config.pages:
+        p = pc.page
+        img = os.path.join(paths["images_sub_dir"], f"page_{p:02d}.png")
+        aud = os.path.join(paths["audio_dir"], f"page_{p:02d}.wav")
+        ass = os.path.join(paths["subtitles_dir"], f"page_{p:02d}.ass")
+        if not os.path.exists(img) or not os.path.exists(aud):
+            print(f"  Page {p:02d}: missing image or audio, left out")
+            continue
+        if not verify_audio(aud):
+            print(f"  Page {p:02d}: audio is SILENT, left out")
+            continue
+        pages.append((p, img, aud, ass if is_dynamic and os.path.exists(ass) else None))
+
+    if len(pages) < 2:
+        print("  Not enough pages to render (need >= 2)")
+        return False
+
+    mix_bgm = _mix_bgm(config)
+    output = _final_video(config, paths)
+    fp = render_fingerprint(config, pages, mix_bgm)
+    if (checkpoint and checkpoint.is_completed(FINAL, "merge", fingerprint=fp)
+            and os.path.exists(output)):
+        print(f"  Up to date ({len(pages)} pages unchanged), skipping")
+        return True
+
+    print(f"  Rendering {len(pages)} pages{' with BGM' if mix_bgm else ''}...")
+    ok = render_single_pass(pages, output, config.video,
+                            bgm=config.bgm if mix_bgm else None,
+                            still_dir=paths["segments_dir"])
+    if ok:
+        print(f"\n[MERGE] Success: {output}")
+        if checkpoint:
+            checkpoint.mark_completed(FINAL, "merge", fingerprint=fp)
+    elif checkpoint:
+        checkpoint.mark_failed(FINAL, "merge", "Single-pass render failed")
+    return ok
+
+
+@tracing.traced("step bgm", cat="step", step="bgm")
 def step_bgm(config, paths, page_nums=None, checkpoint=None):
     """Step 6: Add background music to final video."""
     if not config.bgm.enabled:
@@ -349,7 +691,12 @@ def step_bgm(config, paths, page_nums=None, checkpoint=None):
         print(f"\n[BGM] BGM file not found: {config.bgm.file}")
         return False
 
+    if config.video.render_mode == "single_pass":
+        print("\n[BGM] Mixed into the single-pass render, skipping")
+        return True
+
     from bgm_service import add_bgm_to_video
+    from fingerprint import FINAL, bgm_fingerprint
 
     print("\n" + "=" * 60)
     print("[BGM] Adding background music...")
@@ -364,6 +711,12 @@ def step_bgm(config, paths, page_nums=None, checkpoint=None):
     # Output: save alongside
     output_video = os.path.join(paths["output_dir"], "final_with_bgm.mp4")
 
+    fp = bgm_fingerprint(config, input_video)
+    if (checkpoint and checkpoint.is_completed(FINAL, "bgm", fingerprint=fp)
+            and os.path.exists(output_video)):
+        print("  Up to date (video and BGM unchanged), skipping")
+        return True
+
     ok = add_bgm_to_video(
         video_path=input_video,
         bgm_path=config.bgm.file,
@@ -375,6 +728,10 @@ def step_bgm(config, paths, page_nums=None, checkpoint=None):
 
     if ok:
         print(f"\n[BGM] Success: {output_video}")
+        if checkpoint:
+            checkpoint.mark_completed(FINAL, "bgm", fingerprint=fp)
+    elif checkpoint:
+        checkpoint.mark_failed(FINAL, "bgm", "BGM mixing failed")
     return ok
 
 
@@ -382,28 +739,143 @@ def step_bgm(config, paths, page_nums=None, checkpoint=None):
 _cache = {}
 
 
+def run_dag(config, paths, steps_to_run, page_nums=None, checkpoint=None) -> dict:
+    """Run the selected steps as a per-page dependency graph.
+
+    Each (page, step) node starts as soon as its own inputs exist, so page 1
+    can be encoding while page 10's image is still being generated. Merge
+    waits for every segment node; bgm waits for merge.
+    """
+    from scheduler import DAGScheduler
+
+    pages = _selected_pages(config, page_nums)
+    is_dynamic = config.subtitle.mode == "dynamic"
+    single_pass = config.video.render_mode == "single_pass"
+
+    print("\n" + "=" * 60)
+    print(f"[DAG] Scheduling {', '.join(steps_to_run)} over {len(pages)} pages "
+          f"(workers={config.pipeline.max_workers})")
+    print("=" * 60)
+
+    # Providers are shared by all page nodes of a step
+    tts_provider = img_runner = tts_limiter = tts_cache = img_cache = None
+    if "tts" in steps_to_run:
+        from tts_service import create_tts_provider
+        tts_provider = create_tts_provider(config.tts)
+        tts_limiter = _tts_limiter(config)
+        tts_cache = _tts_cache(config)
+    if "images" in steps_to_run:
+        img_runner = _image_runner(config)
+        img_cache = _image_cache(config)
+    burner = None
+    if "subtitles" in steps_to_run and not is_dynamic:
+        burner = _burn_pool(config, len(pages))
+    from video_service import encode_budget
+    encode_jobs, encode_threads = encode_budget(config.video, len(pages))
+    if "tts" not in steps_to_run:
+        _print_timeline(config, paths, pages)
+
+    # API-bound and encoder-bound steps are capped per step; the rest of
+    # the overlap comes from running different steps side by side.
+    sched = DAGScheduler(
+        max_workers=config.pipeline.max_workers,
+        limits={
+            "tts": config.tts.concurrency,
+            "images": config.image_gen.concurrency,
+            "subtitles": burner.workers if burner else 1,
+            "segments": encode_jobs,
+        },
+    )
+    _cache["segments"] = {}
+
+    for pc in pages:
+        p = pc.page
+        if "tts" in steps_to_run:
+            sched.add((p, "tts"), lambda pc=pc: _tts_page(
+                config, paths, pc, checkpoint, tts_provider, tts_limiter, tts_cache))
+        if "images" in steps_to_run:
+            sched.add((p, "images"), lambda pc=pc: _images_page(
+                config, paths, pc, checkpoint, img_runner, img_cache))
+        if "subtitles" in steps_to_run:
+            deps = [(p, "images")] + ([(p, "tts")] if is_dynamic else [])
+            sched.add((p, "subtitles"), lambda pc=pc: _subtitles_page(
+                config, paths, pc, checkpoint, burner), deps=deps)
+        if "segments" in steps_to_run and not single_pass:
+            sched.add((p, "segments"), lambda pc=pc: _segments_page(
+                config, paths, pc, checkpoint, encode_threads),
+                deps=[(p, "tts"), (p, "images"), (p, "subtitles")])
+
+    if "merge" in steps_to_run:
+        # single_pass renders straight from the page stills and audio
+        merge_deps = ["tts", "images", "subtitles"] if single_pass else ["segments"]
+        sched.add((None, "merge"),
+                  lambda: step_merge(config, paths, page_nums, checkpoint=checkpoint),
+                  deps=[(pc.page, step) for pc in pages for step in merge_deps],
+                  run_on_failed_deps=True)
+    if "bgm" in steps_to_run:
+        sched.add((None, "bgm"),
+                  lambda: step_bgm(config, paths, page_nums, checkpoint=checkpoint),
+                  deps=[(None, "merge")], run_on_failed_deps=True)
+
+    try:
+        sched.run()
+    finally:
+        if img_runner:
+            img_runner.close()
+        if burner:
+            burner.close()
+
+    print("\n[DAG] Summary:")
+    for step, counts in sched.summary().items():
+        print(f"  {step}: {counts['done']} done, {counts['failed']} failed, "
+              f"{counts['skipped']} skipped")
+    if tts_cache:
+        print(f"  tts cache: {tts_cache.report()}")
+    if img_cache:
+        print(f"  image cache: {img_cache.report()}")
+    return sched.summary()
+
+
 def run_pipeline(config_path: str, steps: list[str] = None,
                  page_nums: list[int] = None, preset: str = None,
-                 no_resume: bool = False, validate_only: bool = False):
-    """Execute the pipeline with given config."""
+                 no_resume: bool = False, validate_only: bool = False,
+                 scheduler: str = None, draft: bool = False, variant: str = "",
+                 encode_threads: int = 0, burn_workers: int = 0, burn_memory_mb: int = 0,
+                 validate: bool = True):
+    """Execute the pipeline with given config.
+
+    draft=True renders a low-resolution preview under project_dir/draft/
+    with its own checkpoint; audio and generated images are shared.
+    variant puts render outputs and state under project_dir/<variant>/ the
+    same way (run_presets uses the preset name). encode_threads > 0
+    overrides video.encode_threads; burn_workers / burn_memory_mb > 0
+    override subtitle.workers / subtitle.worker_memory_mb.
+    """
     config = load_config(config_path)
 
+    if scheduler:
+        config.pipeline.scheduler = scheduler
+    if encode_threads:
+        config.video.encode_threads = encode_threads
+    if burn_workers:
+        config.subtitle.workers = burn_workers
+    if burn_memory_mb:
+        config.subtitle.worker_memory_mb = burn_memory_mb
+
     # Override resolution preset from CLI
     if preset:
-        config.video.resolution_preset = preset
-        from resolution_presets import get_preset
-        p = get_preset(preset)
-        config.video.width = p.width
-        config.video.height = p.height
-        if not config.video.adapt_strategy:
-            config.video.adapt_strategy = p.adapt_strategy
+        apply_resolution_preset(config, preset)
 
-    paths = resolve_paths(config)
+    if draft:
+        apply_draft_profile(config)
+
+    paths = resolve_paths(config, variant="/".join(filter(None, ["draft" if draft else "",
+                                                                 variant])))
     ensure_dirs(paths)
 
     # Setup checkpoint
     from checkpoint import CheckpointManager
-    checkpoint = CheckpointManager(config.project_dir)
+    checkpoint = CheckpointManager(paths["state_dir"])
     if no_resume:
         checkpoint.reset()
         print("[CHECKPOINT] Reset — starting fresh")
@@ -417,11 +889,12 @@ def run_pipeline(config_path: str, steps: list[str] = None,
     if validate_only:
         from validator import run_validation
         all_pages = [pc.page for pc in config.pages]
-        report_path = os.path.join(config.project_dir, "validation_report.json")
+        report_path = os.path.join(paths["state_dir"], "validation_report.json")
         run_validation(paths, all_pages, output_report=report_path)
         return
 
     steps_to_run = steps or ALL_STEPS
+    tracing.start()
 
     print("\n" + "=" * 60)
     print("AI Video Maker Pipeline")
@@ -434,6 +907,11 @@ def run_pipeline(config_path: str, steps: list[str] = None,
     if config.video.resolution_preset:
         print(f"Preset: {config.video.resolution_preset}")
     print(f"Subtitle mode: {config.subtitle.mode}")
+    print(f"Scheduler: {config.pipeline.scheduler}")
+    print(f"Render mode: {config.video.render_mode}")
+    if draft:
+        print(f"Draft: {config.video.fps}fps, preset {config.video.preset}, "
+              f"output in {paths['state_dir']}")
     if config.bgm.enabled:
         print(f"BGM: {config.bgm.file} (vol={config.bgm.volume})")
     if page_nums:
@@ -449,23 +927,141 @@ def run_pipeline(config_path: str, steps: list[str] = None,
     }
 
     for step_name in steps_to_run:
-        func = step_map.get(step_name)
-        if not func:
+        if step_name not in step_map:
             print(f"\nUnknown step: {step_name}. Available: {list(step_map.keys())}")
-            continue
-        ok = func(config, paths, page_nums, checkpoint=checkpoint)
-        if not ok:
-            print(f"\n[WARNING] Step '{step_name}' had issues. Continuing...")
+    steps_to_run = [s for s in steps_to_run if s in step_map]
 
-    # Auto-validate after pipeline
-    from validator import run_validation
-    all_pages = page_nums or [pc.page for pc in config.pages]
-    report_path = os.path.join(config.project_dir, "validation_report.json")
-    run_validation(paths, all_pages, output_report=report_path)
+    with tracing.span("pipeline", cat="pipeline", steps=steps_to_run,
+                      scheduler=config.pipeline.scheduler):
+        if config.pipeline.scheduler == "dag":
+            run_dag(config, paths, steps_to_run, page_nums, checkpoint=checkpoint)
+        else:
+            for step_name in steps_to_run:
+                ok = step_map[step_name](config, paths, page_nums, checkpoint=checkpoint)
+                if not ok:
+                    print(f"\n[WARNING] Step '{step_name}' had issues. Continuing...")
+
+        # Auto-validate after pipeline
+        if validate:
+            from validator import run_validation
+            all_pages = page_nums or [pc.page for pc in config.pages]
+            report_path = os.path.join(paths["state_dir"], "validation_report.json")
+            with tracing.span("validate", cat="step", step="validate"):
+                run_validation(dict(paths, output_path=_final_video(config, paths)),
+                               all_pages, output_report=report_path)
+
+    trace_path = os.path.join(paths["state_dir"], "trace.json")
+    tracing.write(trace_path)
 
     print("\n" + "=" * 60)
     print("Pipeline complete!")
     print("=" * 60)
+    tracing.print_summary()
+    print(f"  Trace: {trace_path} (open in chrome://tracing or ui.perfetto.dev)")
+
+
+# Steps whose outputs do not depend on the resolution preset
+SHARED_STEPS = ["tts", "images"]
+
+
+def _prealign(config_path: str, page_nums: list[int] = None) -> None:
+    """Run forced alignment for every page once, before presets render in parallel."""
+    from alignment_service import align_audio_cached
+
+    config = load_config(config_path)
+    paths = resolve_paths(config)
+    for pc in _selected_pages(config, page_nums):
+        aud = os.path.join(paths["audio_dir"], f"page_{pc.page:02d}.wav")
+        if os.path.exists(aud) and pc.subtitle:
+            align_audio_cached(aud, pc.narration, config.subtitle.language)
+
+
+def _run_preset(name: str, kwargs: dict) -> tuple[str, list[str], str]:
+    """Process-pool entry: render one preset, logging to its own pipeline.log.
+
+    stdout/stderr are redirected at the file-descriptor level, so ffmpeg and
+    the burn pool's spawned workers (which inherit them) log there too
+    instead of interleaving on the terminal. Returns (preset, finished
+    videos, log path).
+    """
+    config = load_config(kwargs["config_path"])
+    variant = "/".join(filter(None, ["draft" if kwargs.get("draft") else "", name]))
+    out_dir = resolve_paths(config, variant=variant)["state_dir"]
+    os.makedirs(out_dir, exist_ok=True)
+    log_path = os.path.join(out_dir, "pipeline.log")
+    saved = [os.dup(1), os.dup(2)]
+    with open(log_path, "w", encoding="utf-8") as log:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(log.fileno(), 1)
+        os.dup2(log.fileno(), 2)
+        try:
+            run_pipeline(preset=name, variant=name, **kwargs)
+        except Exception as e:
+            print(f"[ERROR] {type(e).__name__}: {e}")
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            for fd, orig in zip((1, 2), saved):
+                os.dup2(orig, fd)
+                os.close(orig)
+    video_dir = os.path.join(out_dir, "video")
+    videos = sorted(
+        os.path.join(video_dir, f) for f in os.listdir(video_dir) if f.endswith(".mp4")
+    ) if os.path.isdir(video_dir) else []
+    return name, videos, log_path
+
+
+def run_presets(config_path: str, presets: list[str], steps: list[str] = None,
+                page_nums: list[int] = None, no_resume: bool = False,
+                scheduler: str = None, draft: bool = False):
+    """Render one script for several resolution presets.
+
+    TTS and images (and forced alignment in dynamic subtitle mode) run once
+    in the project; subtitles, segments, merge and BGM then run for every
+    preset in parallel, each in its own process with project_dir/<preset>/
+    as output tree and checkpoint, and an equal share of the encode cores
+    and of the subtitle burn workers and memory.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    from resolution_presets import get_preset
+    from subtitle_service import burn_share
+
+    for name in presets:
+        get_preset(name)                    # fail fast on a typo
+    steps_to_run = steps or ALL_STEPS
+    shared = [s for s in steps_to_run if s in SHARED_STEPS]
+    render = [s for s in steps_to_run if s not in SHARED_STEPS]
+
+    if shared:
+        run_pipeline(config_path, steps=shared, page_nums=page_nums, no_resume=no_resume,
+                     scheduler=scheduler, draft=draft, validate=False)
+    if not render:
+        return
+
+    config = load_config(config_path)
+    if "subtitles" in render and config.subtitle.mode == "dynamic":
+        print("\n[ALIGN] Aligning narration once for all presets...")
+        _prealign(config_path, page_nums)
+
+    cores = config.video.encode_threads or os.cpu_count() or 1
+    burn_workers, burn_memory_mb = burn_share(config.subtitle, len(presets))
+    kwargs = dict(config_path=config_path, steps=render, page_nums=page_nums,
+                  no_resume=no_resume, scheduler=scheduler, draft=draft,
+                  encode_threads=max(1, cores // len(presets)),
+                  burn_workers=burn_workers, burn_memory_mb=burn_memory_mb)
+
+    print("\n" + "=" * 60)
+    print(f"[PRESETS] Rendering {', '.join(presets)} in parallel ({', '.join(render)})")
+    print("=" * 60)
+    # spawn: same reason as StaticBurnPool, and each preset gets clean module state
+    with ProcessPoolExecutor(max_workers=len(presets),
+                             mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(_run_preset, name, kwargs) for name in presets]
+        for fut in futures:
+            name, videos, log_path = fut.result()
+            print(f"  {name}: {', '.join(videos) or 'no video produced'} (log: {log_path})")
 
 
 def main():
@@ -483,6 +1079,11 @@ def main():
         "--preset", default=None,
         help="Resolution preset: youtube, shorts, instagram, xiaohongshu, bilibili",
     )
+    parser.add_argument(
+        "--presets", nargs="+", default=None,
+        help="Render several presets from one run: TTS/images shared, "
+             "outputs in project_dir/<preset>/",
+    )
     parser.add_argument(
         "--generate-script", metavar="TOPIC", default=None,
         help="Generate video script from topic, save to --config path",
@@ -499,6 +1100,14 @@ def main():
         "--no-resume", action="store_true",
         help="Ignore checkpoint, force re-run all steps",
     )
+    parser.add_argument(
+        "--draft", action="store_true",
+        help="Fast low-resolution preview into project_dir/draft/ (production outputs untouched)",
+    )
+    parser.add_argument(
+        "--scheduler", choices=["dag", "steps"], default=None,
+        help="dag: per-page dependency graph (default); steps: one step at a time",
+    )
     args = parser.parse_args()
 
     # Script generation mode
@@ -511,6 +1120,20 @@ def main():
         )
         return
 
+    if args.presets:
+        if args.preset or args.validate_only:
+            parser.error("--presets cannot be combined with --preset or --validate-only")
+        run_presets(
+            args.config,
+            args.presets,
+            steps=args.steps,
+            page_nums=args.pages,
+            no_resume=args.no_resume,
+            scheduler=args.scheduler,
+            draft=args.draft,
+        )
+        return
+
     run_pipeline(
         args.config,
         steps=args.steps,
@@ -518,6 +1141,8 @@ def main():
         preset=args.preset,
         no_resume=args.no_resume,
         validate_only=args.validate_only,
+        scheduler=args.scheduler,
+        draft=args.draft,
     )
 
 
@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 """Resolution presets and image adaptation strategies for multi-format video output."""
 
-import subprocess
 from dataclasses import dataclass
 
+from PIL import Image, ImageFilter
+
 
 @dataclass
 class ResolutionPreset:
@@ -59,63 +60,97 @@ def list_presets() -> list[ResolutionPreset]:
 
 
 # --- Image Adaptation ---
+# In-process with Pillow: adapting a page is a resize and a paste, with no
+# ffmpeg process spawned per image.
+
+STRATEGIES = ("crop_center", "letterbox", "blur_fill")
+
+# blur_fill blurs a copy this many times smaller than the frame, then
+# upscales it; the background is out of focus either way
+_BLUR_DOWNSCALE = 8
+_BLUR_RADIUS = 20                   # in frame pixels
+
+
+def _fill_size(w: int, h: int, target_w: int, target_h: int) -> tuple[int, int]:
+    """Smallest size with the image aspect that covers target."""
+    s = max(target_w / w, target_h / h)
+    return max(target_w, round(w * s)), max(target_h, round(h * s))
+
+
+def _fit_size(w: int, h: int, target_w: int, target_h: int) -> tuple[int, int]:
+    """Largest size with the image aspect that fits inside target."""
+    s = min(target_w / w, target_h / h)
+    return max(1, min(target_w, round(w * s))), max(1, min(target_h, round(h * s)))
+
+
+def _crop_center(img: Image.Image, target_w: int, target_h: int,
+                 resample=Image.BICUBIC) -> Image.Image:
+    w, h = _fill_size(img.width, img.height, target_w, target_h)
+    img = img.resize((w, h), resample, reducing_gap=2.0)
+    x, y = (w - target_w) // 2, (h - target_h) // 2
+    return img.crop((x, y, x + target_w, y + target_h))
+
+
+def _letterbox(img: Image.Image, target_w: int, target_h: int,
+               background: Image.Image = None) -> Image.Image:
+    w, h = _fit_size(img.width, img.height, target_w, target_h)
+    canvas = background or Image.new("RGB", (target_w, target_h), "black")
+    canvas.paste(img.resize((w, h), Image.BICUBIC, reducing_gap=2.0),
+                 ((target_w - w) // 2, (target_h - h) // 2))
+    return canvas
+
+
+def _blur_fill(img: Image.Image, target_w: int, target_h: int) -> Image.Image:
+    small_w = max(1, target_w // _BLUR_DOWNSCALE)
+    small_h = max(1, target_h // _BLUR_DOWNSCALE)
+    bg = _crop_center(img, small_w, small_h, resample=Image.BILINEAR)
+    bg = bg.filter(ImageFilter.GaussianBlur(_BLUR_RADIUS / _BLUR_DOWNSCALE))
+    bg = bg.resize((target_w, target_h), Image.BILINEAR)
+    return _letterbox(img, target_w, target_h, background=bg)
+
+
+def adapt(img: Image.Image, target_w: int, target_h: int,
+          strategy: str = "crop_center") -> Image.Image:
+    """RGB image of exactly target_w x target_h, adapted with strategy."""
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy '{strategy}'. Available: {', '.join(STRATEGIES)}")
+    img = img.convert("RGB")
+    if img.size == (target_w, target_h):
+        return img
+    if strategy == "crop_center":
+        return _crop_center(img, target_w, target_h)
+    if strategy == "letterbox":
+        return _letterbox(img, target_w, target_h)
+    return _blur_fill(img, target_w, target_h)
+
 
 def adapt_image_crop_center(input_path: str, output_path: str,
                             target_w: int, target_h: int) -> bool:
     """Scale to fill target then center-crop. Best for same-orientation images."""
-    cmd = [
-        "ffmpeg", "-y", "-i", input_path,
-        "-vf", f"scale={target_w}:{target_h}:force_original_aspect_ratio=increase,"
-               f"crop={target_w}:{target_h}",
-        "-frames:v", "1", output_path,
-    ]
-    r = subprocess.run(cmd, capture_output=True, text=True)
-    return r.returncode == 0
+    return adapt_image(input_path, output_path, target_w, target_h, "crop_center")
 
 
 def adapt_image_letterbox(input_path: str, output_path: str,
                           target_w: int, target_h: int) -> bool:
     """Scale to fit inside target, pad with black bars. Preserves full image."""
-    cmd = [
-        "ffmpeg", "-y", "-i", input_path,
-        "-vf", f"scale={target_w}:{target_h}:force_original_aspect_ratio=decrease,"
-               f"pad={target_w}:{target_h}:(ow-iw)/2:(oh-ih)/2:black",
-        "-frames:v", "1", output_path,
-    ]
-    r = subprocess.run(cmd, capture_output=True, text=True)
-    return r.returncode == 0
+    return adapt_image(input_path, output_path, target_w, target_h, "letterbox")
 
 
 def adapt_image_blur_fill(input_path: str, output_path: str,
                           target_w: int, target_h: int) -> bool:
     """Blurred enlarged version as background + original centered. No black bars."""
-    # Two passes: blurred background scaled to fill + sharp foreground scaled to fit
-    vf = (
-        f"split[bg][fg];"
-        f"[bg]scale={target_w}:{target_h}:force_original_aspect_ratio=increase,"
-        f"crop={target_w}:{target_h},boxblur=20:5[bg_out];"
-        f"[fg]scale={target_w}:{target_h}:force_original_aspect_ratio=decrease[fg_out];"
-        f"[bg_out][fg_out]overlay=(W-w)/2:(H-h)/2"
-    )
-    cmd = [
-        "ffmpeg", "-y", "-i", input_path,
-        "-filter_complex", vf,
-        "-frames:v", "1", output_path,
-    ]
-    r = subprocess.run(cmd, capture_output=True, text=True)
-    return r.returncode == 0
+    return adapt_image(input_path, output_path, target_w, target_h, "blur_fill")
 
 
 def adapt_image(input_path: str, output_path: str,
                 target_w: int, target_h: int, strategy: str = "crop_center") -> bool:
     """Adapt image to target resolution using specified strategy."""
-    strategies = {
-        "crop_center": adapt_image_crop_center,
-        "letterbox": adapt_image_letterbox,
-        "blur_fill": adapt_image_blur_fill,
-    }
-    func = strategies.get(strategy)
-    if not func:
-        available = ", ".join(strategies.keys())
-        raise ValueError(f"Unknown strategy '{strategy}'. Available: {available}")
-    return func(input_path, output_path, target_w, target_h)
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy '{strategy}'. Available: {', '.join(STRATEGIES)}")
+    try:
+        with Image.open(input_path) as img:
+            out = adapt(img, target_w, target_h, strategy)
+    except OSError:
+        return False
+    out.save(output_path, compress_level=1)
+    return True
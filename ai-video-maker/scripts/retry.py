@@ -3,6 +3,7 @@
 
 import functools
 import random
+import threading
 import time
 
 
@@ -16,6 +17,79 @@ class PermanentError(Exception):
     pass
 
 
+def is_rate_limit_error(exc: Exception) -> bool:
+    """True if the exception looks like an HTTP 429 / quota exhaustion response."""
+    for attr in ("code", "status_code", "status"):
+        if getattr(exc, attr, None) == 429:
+            return True
+    msg = str(exc)
+    return "429" in msg or "RESOURCE_EXHAUSTED" in msg or "rate limit" in msg.lower()
+
+
+class TokenBucket:
+    """Thread-safe token-bucket rate limiter shared by concurrent API workers.
+
+    acquire() blocks until a token is available. penalize() halves the refill
+    rate after a 429 so all workers slow down together instead of failing;
+    reward() slowly restores it towards the configured rate on success.
+
+    Usage:
+        limiter = TokenBucket.per_minute(30, burst=4)
+        limiter.acquire()
+        try:
+            call_api()
+            limiter.reward()
+        except Exception as e:
+            if is_rate_limit_error(e):
+                limiter.penalize()
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0, min_rate: float = None):
+        if rate <= 0:
+            raise ValueError(f"Token bucket rate must be positive, got {rate}")
+        self.base_rate = rate                    # tokens per second
+        self.rate = rate
+        self.min_rate = min_rate or rate / 16
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, requests_per_minute: float, burst: int = 1) -> "TokenBucket":
+        return cls(requests_per_minute / 60.0, capacity=burst)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self) -> None:
+        """Block until one token can be taken."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def penalize(self) -> None:
+        """Back off after a rate-limit response: halve the rate, drop saved tokens."""
+        with self._lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+        print(f"  Rate limited, slowing down to {self.rate * 60:.1f} req/min")
+
+    def reward(self) -> None:
+        """Recover 10% of the rate after a successful request."""
+        with self._lock:
+            self._refill()
+            self.rate = min(self.base_rate, self.rate * 1.1)
+
+
 def exponential_backoff(max_retries: int = 3,
                         base_delay: float = 2.0,
                         max_delay: float = 60.0,
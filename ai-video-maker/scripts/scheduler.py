@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Dependency-graph scheduler — run (page, step) nodes as soon as their inputs exist."""
+
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Callable
+
+
+@dataclass
+class Node:
+    """A single unit of work in the pipeline graph."""
+    key: tuple                  # (page_num, step_name), page_num is None for global steps
+    func: Callable[[], bool]
+    deps: list = field(default_factory=list)   # keys that must finish first
+    pool: str = ""              # concurrency pool (defaults to step name)
+    run_on_failed_deps: bool = False           # e.g. merge runs with whatever pages succeeded
+    status: str = "pending"     # pending | running | done | failed | skipped
+
+
+def node_label(key: tuple) -> str:
+    """Human-readable label for a node key."""
+    page, step = key
+    return step if page is None else f"page {page:02d} {step}"
+
+
+class DAGScheduler:
+    """Runs graph nodes on a thread pool, honouring dependencies and per-pool limits.
+
+    A node becomes ready once every dependency has finished. If a dependency
+    failed (or was skipped) the node is skipped too, unless it was added with
+    run_on_failed_deps=True. Dependencies on keys that are not in the graph
+    are treated as already satisfied, so a partial graph (--steps subset)
+    picks up artifacts produced by earlier runs.
+    """
+
+    def __init__(self, max_workers: int = 4, limits: dict = None):
+        self.max_workers = max(1, max_workers)
+        self.limits = limits or {}
+        self.nodes: dict[tuple, Node] = {}
+
+    def add(self, key: tuple, func: Callable[[], bool], deps: list = None,
+            pool: str = "", run_on_failed_deps: bool = False) -> Node:
+        """Register a node. Insertion order is the tie-break between ready nodes."""
+        node = Node(
+            key=key, func=func, deps=list(deps or []),
+            pool=pool or key[1], run_on_failed_deps=run_on_failed_deps,
+        )
+        self.nodes[key] = node
+        return node
+
+    def _limit(self, pool: str) -> int:
+        return max(1, self.limits.get(pool, self.max_workers))
+
+    def _resolve(self, node: Node) -> str:
+        """Return 'ready', 'wait' or 'skip' for a pending node."""
+        for dep in node.deps:
+            dep_node = self.nodes.get(dep)
+            if dep_node is None:
+                continue
+            if dep_node.status in ("pending", "running"):
+                return "wait"
+            if dep_node.status != "done" and not node.run_on_failed_deps:
+                return "skip"
+        return "ready"
+
+    def run(self) -> dict:
+        """Execute the graph. Returns {key: final status}."""
+        running = {}                       # future -> node
+        in_pool = {}                       # pool -> number of running nodes
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                progressed = True
+                while progressed:
+                    progressed = False
+                    for node in self.nodes.values():
+                        if node.status != "pending":
+                            continue
+                        state = self._resolve(node)
+                        if state == "skip":
+                            node.status = "skipped"
+                            print(f"  [DAG] {node_label(node.key)}: skipped (upstream failed)")
+                            progressed = True
+                        elif (state == "ready"
+                              and len(running) < self.max_workers
+                              and in_pool.get(node.pool, 0) < self._limit(node.pool)):
+                            node.status = "running"
+                            in_pool[node.pool] = in_pool.get(node.pool, 0) + 1
+                            running[executor.submit(node.func)] = node
+                            progressed = True
+
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    node = running.pop(fut)
+                    in_pool[node.pool] -= 1
+                    try:
+                        node.status = "done" if fut.result() else "failed"
+                    except Exception as e:
+                        print(f"  [DAG] {node_label(node.key)}: error: {type(e).__name__}: {e}")
+                        node.status = "failed"
+
+        return {key: node.status for key, node in self.nodes.items()}
+
+    def summary(self) -> dict:
+        """Per-step counts of final node statuses."""
+        result = {}
+        for (_, step), node in self.nodes.items():
+            counts = result.setdefault(step, {"done": 0, "failed": 0, "skipped": 0})
+            if node.status in counts:
+                counts[node.status] += 1
+        return result
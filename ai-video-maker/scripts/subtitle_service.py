@@ -1,13 +1,29 @@
 #!/usr/bin/env python3
 """Subtitle burning service — outlined and boxed styles."""
 
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+
 from PIL import Image, ImageDraw, ImageFont
 
 from config import SubtitleConfig
 
+# (font_path, font_size) -> loaded font; each pool worker fills its own copy once
+_font_cache = {}
+# SubtitleConfig of a StaticBurnPool worker process (set by its initializer)
+_worker_config = None
+
 
 def _load_font(config: SubtitleConfig) -> ImageFont.FreeTypeFont:
-    """Load font with fallback chain."""
+    """Load font with fallback chain (cached per process)."""
+    key = (config.font_path, config.font_size)
+    if key not in _font_cache:
+        _font_cache[key] = _load_font_uncached(config)
+    return _font_cache[key]
+
+
+def _load_font_uncached(config: SubtitleConfig) -> ImageFont.FreeTypeFont:
     fallback_fonts = [
         config.font_path,
         "/System/Library/Fonts/STHeiti Medium.ttc",
@@ -120,6 +136,100 @@ def burn_subtitle(src_path: str, dst_path: str, text: str, config: SubtitleConfi
         burn_subtitle_boxed(src_path, dst_path, text, config)
 
 
+# --- Parallel static burning ---
+
+# Full-frame buffers alive at once while burning: decoded RGBA source,
+# RGBA overlay, composite result and its RGB conversion, plus slack.
+_FRAMES_PER_BURN = 5
+
+
+def _available_memory() -> int:
+    """Best-effort available RAM in bytes (0 if unknown)."""
+    try:
+        with open("/proc/meminfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // 2
+    except (ValueError, OSError, AttributeError):
+        return 0
+
+
+def burn_worker_count(width: int, height: int, jobs: int,
+                      max_workers: int = 0, memory_mb: int = 0) -> int:
+    """Number of burn processes that fits both the cores and the memory budget.
+
+    Each worker holds about _FRAMES_PER_BURN RGBA frames of width x height
+    (~165MB at 4K). The budget is memory_mb if set, else half of available RAM.
+    """
+    workers = max_workers or os.cpu_count() or 1
+    budget = memory_mb * 1024 * 1024 if memory_mb else _available_memory() // 2
+    if budget:
+        per_worker = width * height * 4 * _FRAMES_PER_BURN
+        workers = min(workers, max(1, budget // per_worker))
+    return max(1, min(workers, jobs))
+
+
+def burn_share(config: SubtitleConfig, shares: int) -> tuple[int, int]:
+    """(workers, memory_mb) for one of `shares` processes burning at once.
+
+    Splits the configured (or automatic) worker count and memory budget so
+    concurrent pools together stay within what one pool would use.
+    """
+    workers = config.workers or os.cpu_count() or 1
+    memory_mb = config.worker_memory_mb or _available_memory() // 2 // (1024 * 1024)
+    return max(1, workers // shares), max(1, memory_mb // shares) if memory_mb else 0
+
+
+def _init_burn_worker(config: SubtitleConfig) -> None:
+    """Pool initializer: load the font once per worker process."""
+    global _worker_config
+    _worker_config = config
+    _load_font(config)
+
+
+def _burn_job(src_path: str, dst_path: str, text: str) -> None:
+    burn_subtitle(src_path, dst_path, text, _worker_config)
+
+
+class StaticBurnPool:
+    """Process pool for static subtitle burning (pure CPU Pillow work, GIL-free).
+
+    Usage:
+        with StaticBurnPool(config.subtitle, 1920, 1080, jobs=len(pages)) as pool:
+            futures = [pool.submit(src, dst, text) for src, dst, text in jobs]
+            for f in futures:
+                f.result()
+    """
+
+    def __init__(self, config: SubtitleConfig, width: int, height: int, jobs: int):
+        self.workers = burn_worker_count(width, height, jobs,
+                                         config.workers, config.worker_memory_mb)
+        # spawn, not fork: workers start while other threads are running
+        # subprocesses, and a forked worker would inherit (and hold open)
+        # their exec-status pipes, hanging subprocess.run in those threads.
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_burn_worker, initargs=(config,),
+        )
+
+    def submit(self, src_path: str, dst_path: str, text: str) -> Future:
+        return self._executor.submit(_burn_job, src_path, dst_path, text)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
 def generate_dynamic_subtitle(audio_path: str, narration_text: str,
                                subtitle_text: str, ass_output_path: str,
                                config: SubtitleConfig,
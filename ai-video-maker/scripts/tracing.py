@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""Pipeline tracing — per-step/per-page spans exported as Chrome trace JSON.
+
+Spans nest per thread: a page span opened by a pipeline node contains the
+ffmpeg/ffprobe calls made while it is open. Each span records wall time
+plus arbitrary args; subprocess spans add the command and exit status, and
+any span can list the files it produced so bytes written are reported.
+
+The output opens in chrome://tracing or https://ui.perfetto.dev.
+
+Usage:
+    tracing.start()
+    with tracing.span("page 03 segments", cat="page", page=3, step="segments"):
+        r = tracing.run(["ffmpeg", ...], capture_output=True, text=True)
+        tracing.record_output("segments/page_03.mp4")
+    tracing.write("project/trace.json")
+    tracing.print_summary()
+"""
+
+import functools
+import json
+import os
+import re
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+
+# Longest command line kept in a span's args
+_MAX_CMD_CHARS = 2000
+# Write-then-rename temp names: x.tmp, x.<pid>.<tid>.tmp.mp4, ...
+_TEMP_NAME = re.compile(r"\.tmp(\.[^./\\]*)?$")
+
+
+class _Span:
+    __slots__ = ("name", "cat", "start", "args", "outputs")
+
+    def __init__(self, name: str, cat: str, args: dict):
+        self.name = name
+        self.cat = cat
+        self.start = time.perf_counter()
+        self.args = args
+        self.outputs = set()
+
+
+class Tracer:
+    """Collects complete ("X") trace events from any thread."""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.events = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._threads = {}                  # thread ident -> small tid
+
+    def _stack(self) -> list:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _tid(self) -> int:
+        ident = threading.get_ident()
+        with self._lock:
+            if ident not in self._threads:
+                self._threads[ident] = len(self._threads) + 1
+                self.events.append({
+                    "name": "thread_name", "ph": "M", "pid": os.getpid(),
+                    "tid": self._threads[ident],
+                    "args": {"name": threading.current_thread().name},
+                })
+            return self._threads[ident]
+
+    @contextmanager
+    def span(self, name: str, cat: str = "", **args):
+        s = _Span(name, cat, args)
+        stack = self._stack()
+        stack.append(s)
+        try:
+            yield s
+        except BaseException as e:
+            s.args.setdefault("error", f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            stack.pop()
+            end = time.perf_counter()
+            if s.outputs:
+                s.args["outputs"] = sorted(s.outputs)
+                s.args["bytes_written"] = sum(
+                    os.path.getsize(p) for p in s.outputs if os.path.isfile(p)
+                )
+            event = {
+                "name": s.name, "cat": s.cat, "ph": "X", "pid": os.getpid(),
+                "tid": self._tid(),
+                "ts": round((s.start - self.origin) * 1e6),
+                "dur": round((end - s.start) * 1e6),
+                "args": s.args,
+            }
+            with self._lock:
+                self.events.append(event)
+
+    def annotate(self, **args) -> None:
+        """Add args to the innermost open span on this thread."""
+        stack = self._stack()
+        if stack:
+            stack[-1].args.update(args)
+
+    def record_output(self, path: str) -> None:
+        """Attribute a written file to every open span on this thread."""
+        for s in self._stack():
+            s.outputs.add(path)
+
+    def write(self, path: str) -> None:
+        with self._lock:
+            data = {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def complete_events(self, cat: str = None) -> list:
+        with self._lock:
+            return [e for e in self.events
+                    if e["ph"] == "X" and (cat is None or e["cat"] == cat)]
+
+    def summary(self, top: int = 5) -> dict:
+        """Slowest pages, steps and external programs (durations in seconds)."""
+        pages, steps, programs = {}, {}, {}
+        for e in self.complete_events("page"):
+            sec = e["dur"] / 1e6
+            page = e["args"].get("page")
+            step = e["args"].get("step", e["name"])
+            pages[page] = pages.get(page, 0.0) + sec
+            total, count, slowest = steps.get(step, (0.0, 0, 0.0))
+            steps[step] = (total + sec, count + 1, max(slowest, sec))
+        for e in self.complete_events("step"):
+            # Whole-video steps (merge, bgm) have no page spans
+            step = e["args"].get("step", e["name"])
+            if step not in steps:
+                sec = e["dur"] / 1e6
+                steps[step] = (sec, 1, sec)
+        for e in self.complete_events("subprocess"):
+            prog = e["name"]
+            total, count = programs.get(prog, (0.0, 0))
+            programs[prog] = (total + e["dur"] / 1e6, count + 1)
+
+        return {
+            "pages": sorted(pages.items(), key=lambda kv: -kv[1])[:top],
+            "steps": sorted(steps.items(), key=lambda kv: -kv[1][0]),
+            "programs": sorted(programs.items(), key=lambda kv: -kv[1][0]),
+        }
+
+    def print_summary(self, top: int = 5) -> None:
+        s = self.summary(top)
+        if s["steps"]:
+            print(f"  {'step':<12} {'total':>9} {'count':>6} {'slowest':>9}")
+            for step, (total, count, slowest) in s["steps"]:
+                print(f"  {step:<12} {total:>8.2f}s {count:>6} {slowest:>8.2f}s")
+        if s["pages"]:
+            print("  Slowest pages: " + ", ".join(
+                f"page {page:02d} {sec:.2f}s" for page, sec in s["pages"] if page is not None
+            ))
+        if s["programs"]:
+            print("  External programs: " + ", ".join(
+                f"{prog} {total:.2f}s/{count} calls" for prog, (total, count) in s["programs"]
+            ))
+
+
+# Active tracer; spans are dropped when tracing was never started
+_tracer = None
+
+
+def start() -> Tracer:
+    """Begin a fresh trace and make it the active tracer."""
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def current() -> Tracer:
+    return _tracer
+
+
+@contextmanager
+def span(name: str, cat: str = "", **args):
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.span(name, cat, **args) as s:
+        yield s
+
+
+def traced(name: str, cat: str = "", **args):
+    """Decorator form of span()."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*a, **kw):
+            with span(name, cat, **args):
+                return func(*a, **kw)
+        return wrapper
+    return decorator
+
+
+def annotate(**args) -> None:
+    if _tracer is not None:
+        _tracer.annotate(**args)
+
+
+def record_output(path: str) -> None:
+    if _tracer is not None:
+        _tracer.record_output(path)
+
+
+def run(cmd: list, **kwargs) -> subprocess.CompletedProcess:
+    """subprocess.run inside a span that records the command and exit status."""
+    prog = os.path.basename(str(cmd[0]))
+    with span(prog, cat="subprocess",
+              cmd=subprocess.list2cmdline([str(c) for c in cmd])[:_MAX_CMD_CHARS]) as s:
+        r = subprocess.run(cmd, **kwargs)
+        if s is not None:
+            s.args["exit_status"] = r.returncode
+            # ffmpeg writes its output file last on the command line; temp
+            # files are renamed afterwards, so callers record the final path
+            out = str(cmd[-1])
+            if (prog == "ffmpeg" and r.returncode == 0 and os.path.isfile(out)
+                    and not _TEMP_NAME.search(out)):
+                record_output(out)
+        return r
+
+
+def write(path: str) -> None:
+    if _tracer is not None:
+        _tracer.write(path)
+
+
+def print_summary(top: int = 5) -> None:
+    if _tracer is not None:
+        _tracer.print_summary(top)
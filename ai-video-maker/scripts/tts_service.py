@@ -1,13 +1,81 @@
 #!/usr/bin/env python3
 """TTS generation service with provider abstraction."""
 
+import asyncio
 import os
-import subprocess
+import threading
 import time
 import wave
 from abc import ABC, abstractmethod
 
 from config import TTSConfig
+import audio_analysis
+import tracing
+
+# 429s only slow the shared limiter down; stop retrying a page after this many
+MAX_RATE_LIMIT_RETRIES = 20
+
+# Provider output format: 16-bit mono PCM
+SAMPLE_RATE = 24000
+SAMPLE_WIDTH = 2
+
+
+def partial_path(output_path: str) -> str:
+    """Where a streamed WAV grows until it is complete."""
+    return output_path + ".part.wav"
+
+
+class StreamingWav:
+    """Append PCM to a WAV as it arrives; move it into place on close.
+
+    The audio grows at partial_path(output_path), whose header is patched
+    after every write, so it is a valid WAV of everything received so far.
+    Closing without error finalizes it and renames it to output_path; an
+    exception discards it. Time to first audio and the audio length are
+    added to the open trace span.
+
+    Usage:
+        with StreamingWav("audio/page_01.wav") as out:
+            for pcm in chunks:
+                out.write(pcm)
+    """
+
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+        self.started = time.perf_counter()
+        self.ttfb = None                # seconds until the first audio byte
+        self.frames = 0                 # frames written so far
+        self._carry = b""               # odd byte of a sample split across chunks
+        self._wav = None
+
+    def __enter__(self):
+        self._wav = wave.open(partial_path(self.output_path), "wb")
+        self._wav.setnchannels(1)
+        self._wav.setsampwidth(SAMPLE_WIDTH)
+        self._wav.setframerate(SAMPLE_RATE)
+        return self
+
+    def write(self, pcm: bytes) -> None:
+        if not pcm:
+            return
+        if self.ttfb is None:
+            self.ttfb = time.perf_counter() - self.started
+        pcm = self._carry + pcm
+        whole = len(pcm) - len(pcm) % SAMPLE_WIDTH
+        self._carry = pcm[whole:]
+        self._wav.writeframes(pcm[:whole])
+        self.frames += whole // SAMPLE_WIDTH
+
+    def __exit__(self, exc_type, *exc):
+        self._wav.close()
+        part = partial_path(self.output_path)
+        if exc_type is None and self.frames:
+            os.replace(part, self.output_path)
+        elif os.path.exists(part):
+            os.unlink(part)
+        tracing.annotate(ttfb=round(self.ttfb or 0.0, 3),
+                         audio_seconds=round(self.frames / SAMPLE_RATE, 2))
+        return False
 
 
 class TTSProvider(ABC):
@@ -16,6 +84,10 @@ class TTSProvider(ABC):
         """Generate TTS audio. Returns True on success."""
         ...
 
+    async def agenerate(self, text: str, output_path: str) -> bool:
+        """Async variant. Providers without a native async client run in a thread."""
+        return await asyncio.to_thread(self.generate, text, output_path)
+
 
 class GeminiTTS(TTSProvider):
     def __init__(self, config: TTSConfig):
@@ -29,44 +101,144 @@ class GeminiTTS(TTSProvider):
         self.client = genai.Client(api_key=api_key)
         self.types = types
 
+    def _request_config(self):
+        return self.types.GenerateContentConfig(
+            response_modalities=["AUDIO"],
+            speech_config=self.types.SpeechConfig(
+                voice_config=self.types.VoiceConfig(
+                    prebuilt_voice_config=self.types.PrebuiltVoiceConfig(
+                        voice_name=self.config.voice
+                    )
+                )
+            ),
+        )
+
+    @staticmethod
+    def _audio_chunks(response):
+        """PCM payloads of a (possibly partial) response."""
+        for cand in response.candidates or []:
+            for part in (cand.content.parts if cand.content else None) or []:
+                if part.inline_data and part.inline_data.data:
+                    yield part.inline_data.data
+
     def generate(self, text: str, output_path: str) -> bool:
+        if self.config.stream:
+            return self._generate_stream(text, output_path)
         response = self.client.models.generate_content(
             model="gemini-2.5-flash-preview-tts",
             contents=text,
-            config=self.types.GenerateContentConfig(
-                response_modalities=["AUDIO"],
-                speech_config=self.types.SpeechConfig(
-                    voice_config=self.types.VoiceConfig(
-                        prebuilt_voice_config=self.types.PrebuiltVoiceConfig(
-                            voice_name=self.config.voice
-                        )
-                    )
-                ),
-            ),
+            config=self._request_config(),
         )
         data = response.candidates[0].content.parts[0].inline_data.data
         with wave.open(output_path, "wb") as wf:
             wf.setnchannels(1)
-            wf.setsampwidth(2)
-            wf.setframerate(24000)
+            wf.setsampwidth(SAMPLE_WIDTH)
+            wf.setframerate(SAMPLE_RATE)
             wf.writeframes(data)
         return True
 
+    def _generate_stream(self, text: str, output_path: str) -> bool:
+        """Write audio as the response streams in; memory stays at one chunk."""
+        with StreamingWav(output_path) as out:
+            for response in self.client.models.generate_content_stream(
+                model="gemini-2.5-flash-preview-tts",
+                contents=text,
+                config=self._request_config(),
+            ):
+                for pcm in self._audio_chunks(response):
+                    out.write(pcm)
+        return out.frames > 0
+
 
 class EdgeTTS(TTSProvider):
+    """Edge TTS through the edge_tts library on one background event loop.
+
+    Pages submitted from any thread share the loop, so they synthesize
+    concurrently in this process instead of starting an edge-tts CLI per
+    page. The service streams MP3, which is decoded to 24 kHz mono PCM WAV
+    like the other providers: in-process with miniaudio when it is
+    installed, otherwise by piping the chunks into one ffmpeg per page.
+    """
+
     def __init__(self, config: TTSConfig):
+        import edge_tts
+        self.edge_tts = edge_tts
+        try:
+            import miniaudio
+        except ImportError:
+            miniaudio = None
+        self.miniaudio = miniaudio
         self.config = config
         self.voice = config.voice or "zh-CN-XiaoxiaoNeural"
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever,
+                                        name="edge-tts-aio", daemon=True)
+        self._thread.start()
 
     def generate(self, text: str, output_path: str) -> bool:
-        cmd = [
-            "edge-tts",
-            "--voice", self.voice,
-            "--text", text,
-            "--write-media", output_path,
-        ]
-        r = subprocess.run(cmd, capture_output=True, text=True)
-        return r.returncode == 0
+        # Reported with the external programs, like the CLI it replaces
+        with tracing.span("edge-tts", cat="subprocess", voice=self.voice):
+            ok = asyncio.run_coroutine_threadsafe(
+                self.agenerate(text, output_path), self.loop).result()
+            if ok:
+                tracing.record_output(output_path)
+            return ok
+
+    async def agenerate(self, text: str, output_path: str) -> bool:
+        if self.miniaudio is None:
+            return await self._generate_ffmpeg(text, output_path)
+        mp3 = bytearray()
+        async for chunk in self.edge_tts.Communicate(text, self.voice).stream():
+            if chunk["type"] == "audio":
+                mp3 += chunk["data"]
+        # Decoding is CPU work; keep it off the loop other pages stream on
+        return await asyncio.to_thread(self._decode_mp3, bytes(mp3), output_path)
+
+    def _decode_mp3(self, mp3: bytes, output_path: str) -> bool:
+        try:
+            pcm = self.miniaudio.decode(mp3, output_format=self.miniaudio.SampleFormat.SIGNED16,
+                                        nchannels=1, sample_rate=SAMPLE_RATE)
+        except self.miniaudio.DecodeError as e:
+            print(f"    Could not decode Edge TTS audio: {e}")
+            return False
+        tmp = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp.wav"
+        try:
+            with wave.open(tmp, "wb") as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(SAMPLE_WIDTH)
+                wf.setframerate(SAMPLE_RATE)
+                wf.writeframes(pcm.samples.tobytes())
+            os.replace(tmp, output_path)
+            return True
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+    async def _generate_ffmpeg(self, text: str, output_path: str) -> bool:
+        tmp = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp.wav"
+        decoder = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-v", "error", "-y", "-f", "mp3", "-i", "pipe:0",
+            "-ac", "1", "-ar", "24000", "-c:a", "pcm_s16le", tmp,
+            stdin=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            async for chunk in self.edge_tts.Communicate(text, self.voice).stream():
+                if chunk["type"] == "audio":
+                    decoder.stdin.write(chunk["data"])
+                    await decoder.stdin.drain()
+            decoder.stdin.close()
+            _, err = await decoder.communicate()
+            if decoder.returncode != 0:
+                print(f"    ffmpeg could not decode Edge TTS audio: {err.decode(errors='replace')[-300:]}")
+                return False
+            os.replace(tmp, output_path)
+            return True
+        finally:
+            if decoder.returncode is None:
+                decoder.kill()
+                await decoder.wait()
+            if os.path.exists(tmp):
+                os.unlink(tmp)
 
 
 def create_tts_provider(config: TTSConfig) -> TTSProvider:
@@ -82,20 +254,9 @@ def create_tts_provider(config: TTSConfig) -> TTSProvider:
 
 
 def verify_audio(path: str) -> bool:
-    """Check audio is not silent (has non-zero amplitude)."""
-    try:
-        w = wave.open(path, "rb")
-        frames = w.readframes(min(w.getnframes(), 5000))
-        w.close()
-        if not frames:
-            return False
-        mx = max(
-            abs(int.from_bytes(frames[i : i + 2], "little", signed=True))
-            for i in range(0, len(frames), 2)
-        )
-        return mx > 0
-    except Exception:
-        return False
+    """Check the whole file holds audible sound, not silence or a lone click."""
+    stats = audio_analysis.analyze(path)
+    return stats is not None and not stats.is_silent
 
 
 def apply_speed(input_path: str, output_path: str, speed: float) -> bool:
@@ -108,7 +269,7 @@ def apply_speed(input_path: str, output_path: str, speed: float) -> bool:
         "-ar", "24000",
         output_path,
     ]
-    r = subprocess.run(cmd, capture_output=True, text=True)
+    r = tracing.run(cmd, capture_output=True, text=True)
     if r.returncode == 0:
         # Replace original with speed-adjusted version
         os.replace(output_path, input_path)
@@ -117,12 +278,25 @@ def apply_speed(input_path: str, output_path: str, speed: float) -> bool:
 
 
 def generate_tts_with_retry(provider: TTSProvider, text: str, output_path: str,
-                             config: TTSConfig) -> bool:
-    """Generate TTS with retry loop and silence verification."""
-    for attempt in range(1, config.max_retries + 1):
+                             config: TTSConfig, limiter=None) -> bool:
+    """Generate TTS with retry loop and silence verification.
+
+    If a shared TokenBucket limiter is given, every request waits for a token,
+    and rate-limit (429) errors slow the bucket down and retry without using
+    up one of the max_retries attempts.
+    """
+    from retry import is_rate_limit_error
+
+    attempt = 1
+    rate_limited = 0
+    while attempt <= config.max_retries:
+        if limiter:
+            limiter.acquire()
         try:
             success = provider.generate(text, output_path)
             if success and os.path.exists(output_path) and verify_audio(output_path):
+                if limiter:
+                    limiter.reward()
                 # Apply speed adjustment if needed
                 if config.speed != 1.0:
                     tmp = output_path + ".speed.wav"
@@ -130,10 +304,15 @@ def generate_tts_with_retry(provider: TTSProvider, text: str, output_path: str,
                 return True
             print(f"    Attempt {attempt}: audio silent or empty, retrying...")
         except Exception as e:
+            if limiter and is_rate_limit_error(e) and rate_limited < MAX_RATE_LIMIT_RETRIES:
+                rate_limited += 1
+                limiter.penalize()
+                continue
             print(f"    Attempt {attempt} failed: {e}")
 
         if attempt < config.max_retries:
             time.sleep(config.retry_delay)
+        attempt += 1
 
     print(f"    FAILED after {config.max_retries} attempts")
     return False
@@ -3,10 +3,14 @@
 
 import json
 import os
-import subprocess
-import wave
 from dataclasses import dataclass, field, asdict
 
+import audio_analysis
+import media_info
+
+# Pauses longer than this inside a page's narration are worth a look
+MAX_PAUSE_SECONDS = 3.0
+
 
 @dataclass
 class CheckResult:
@@ -38,15 +42,9 @@ class ValidationReport:
 
 
 def _get_duration(path: str) -> float:
-    """Get media duration via ffprobe."""
-    r = subprocess.run(
-        ["ffprobe", "-v", "quiet", "-show_entries", "format=duration", "-of", "csv=p=0", path],
-        capture_output=True, text=True,
-    )
-    try:
-        return float(r.stdout.strip())
-    except (ValueError, AttributeError):
-        return 0.0
+    """Get media duration (0.0 if it cannot be probed)."""
+    info = media_info.probe(path)
+    return info.duration if info else 0.0
 
 
 def check_audio_files(audio_dir: str, page_nums: list[int]) -> list[CheckResult]:
@@ -75,28 +73,30 @@ def check_audio_files(audio_dir: str, page_nums: list[int]) -> list[CheckResult]
             ))
             continue
 
-        # Silence check
-        try:
-            w = wave.open(path, "rb")
-            frames = w.readframes(min(w.getnframes(), 5000))
-            w.close()
-            if frames:
-                mx = max(abs(int.from_bytes(frames[i:i+2], "little", signed=True))
-                         for i in range(0, min(len(frames), 10000), 2))
-                if mx == 0:
-                    results.append(CheckResult(
-                        name=f"audio_page_{p:02d}_silence",
-                        status="error", severity="high",
-                        message="Audio is completely silent",
-                    ))
-                    continue
-        except Exception as e:
+        # Silence check (whole file)
+        stats = audio_analysis.analyze(path)
+        if stats is None:
             results.append(CheckResult(
                 name=f"audio_page_{p:02d}_read",
                 status="warning", severity="medium",
-                message=f"Cannot read audio: {e}",
+                message="Cannot read audio (not a PCM WAV)",
             ))
             continue
+        if stats.is_silent:
+            results.append(CheckResult(
+                name=f"audio_page_{p:02d}_silence",
+                status="error", severity="high",
+                message=f"Audio is silent ({stats.audible:.2f}s audible, peak {stats.peak_db:.0f} dBFS)",
+                details={"audible": stats.audible, "peak_db": stats.peak_db},
+            ))
+            continue
+        if stats.longest_silence > MAX_PAUSE_SECONDS:
+            results.append(CheckResult(
+                name=f"audio_page_{p:02d}_pause",
+                status="warning", severity="low",
+                message=f"Silent gap of {stats.longest_silence:.1f}s inside the narration",
+                details={"longest_silence": stats.longest_silence},
+            ))
 
         # Duration check (15-35s recommended, warn outside 5-60s)
         dur = _get_duration(path)
@@ -118,8 +118,10 @@ def check_audio_files(audio_dir: str, page_nums: list[int]) -> list[CheckResult]
             results.append(CheckResult(
                 name=f"audio_page_{p:02d}",
                 status="pass",
-                message=f"OK ({dur:.1f}s, {size/1024:.0f}KB)",
-                details={"duration": dur, "size": size},
+                message=f"OK ({dur:.1f}s, {size/1024:.0f}KB, peak {stats.peak_db:.0f} dBFS)",
+                details={"duration": dur, "size": size, "peak_db": stats.peak_db,
+                         "rms_db": stats.rms_db, "leading_silence": stats.leading_silence,
+                         "trailing_silence": stats.trailing_silence},
             ))
 
     return results
@@ -1,121 +1,845 @@
 #!/usr/bin/env python3
-"""Video composition service — Ken Burns, segments, transitions, merge."""
+"""Video composition service — Ken Burns, segments, transitions, merge, single-pass render."""
 
+import math
 import os
-import subprocess
+import shutil
 import tempfile
+import threading
+import wave
+from concurrent.futures import ThreadPoolExecutor
 
-from config import VideoConfig
+from config import BGMConfig, VideoConfig
+import media_info
+import tracing
 
 
 def get_audio_duration(path: str) -> float:
-    """Get audio/video duration in seconds via ffprobe."""
-    r = subprocess.run(
-        ["ffprobe", "-v", "quiet", "-show_entries", "format=duration", "-of", "csv=p=0", path],
-        capture_output=True, text=True,
-    )
-    return float(r.stdout.strip())
+    """Get audio/video duration in seconds (cached ffprobe, see media_info)."""
+    return media_info.duration(path)
+
+
+def segment_duration(audio_path: str, config: VideoConfig) -> float:
+    """Length of a page's segment: narration, the buffer pause, then the xfade.
+
+    The next page's transition (and narration) starts transition_dur before
+    this segment ends, so that time is added on top of the pause: pages
+    follow each other buffer seconds apart and never overlap.
+    """
+    return get_audio_duration(audio_path) + config.buffer + config.transition_dur
+
+
+def xfade_offsets(durations: list[float], config: VideoConfig) -> list[float]:
+    """Start time of each xfade when segments of these lengths are chained."""
+    offsets = []
+    cumulative = 0.0
+    for i in range(len(durations) - 1):
+        cumulative += durations[i]
+        offsets.append(max(0, cumulative - (i + 1) * config.transition_dur))
+    return offsets
+
+
+def plan_timeline(audio_paths: list[str], config: VideoConfig) -> tuple[list[float], list[float], float]:
+    """(segment durations, xfade offsets, total duration) from the narration alone.
 
+    WAV lengths come from their headers, so the whole timeline is known
+    before any page is encoded.
+    """
+    durations = [segment_duration(a, config) for a in audio_paths]
+    total = sum(durations) - max(0, len(durations) - 1) * config.transition_dur
+    return durations, xfade_offsets(durations, config), total
+
+
+def write_narration_timeline(audio_files: list[str], durations: list[float],
+                             output_path: str, config: VideoConfig) -> bool:
+    """Lay the page WAVs out on the merged video's timeline as one PCM WAV.
+
+    Page i starts where its segment starts after the xfades (xfade_offsets),
+    so narration stays in step with its picture and ASS timing; silence fills
+    the buffers. segment_duration leaves every page buffer seconds of
+    silence before the next one starts, so this is a plain concatenation.
+    Returns False if the WAVs are not 16-bit PCM with one shared format
+    (callers then use the segments' own audio).
+    """
+    params = None
+    clips = []
+    for path in audio_files:
+        try:
+            with wave.open(path, "rb") as w:
+                fmt = (w.getnchannels(), w.getsampwidth(), w.getframerate())
+                clips.append(w.readframes(w.getnframes()))
+        except (OSError, EOFError, wave.Error):
+            return False
+        if params not in (None, fmt):
+            return False
+        params = fmt
+    channels, width, rate = params
+    if width != 2:
+        return False
+
+    frame = channels * width
+    starts = [0.0] + xfade_offsets(durations, config)
+    total = sum(durations) - (len(durations) - 1) * config.transition_dur
+    out = bytearray(round(total * rate) * frame)
+    ends = [round(s * rate) * frame for s in starts[1:]] + [len(out)]
+    for start, end, data in zip(starts, ends, clips):
+        pos = round(start * rate) * frame
+        out[pos:pos + len(data)] = data[:max(0, end - pos)]
+
+    with wave.open(output_path, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(width)
+        w.setframerate(rate)
+        w.writeframes(bytes(out))
+    return True
+
+
+def _voice_concat(first_input: int, durations: list[float], config: VideoConfig) -> str:
+    """Filter chain joining per-page narration inputs on the xfade timeline.
+
+    Each page (segment audio or bare WAV) is padded or cut to the time it
+    leads the timeline, duration minus the xfade into the next page, so the
+    voice stays on its picture without the timeline WAV.
+    """
+    n = len(durations)
+    chain = ""
+    for i, d in enumerate(durations):
+        slot = d - config.transition_dur if i < n - 1 else d
+        chain += f"[{first_input + i}:a]apad=whole_dur={slot:.3f},atrim=0:{slot:.3f}[vo{i}];"
+    return chain + "".join(f"[vo{i}]" for i in range(n)) + f"concat=n={n}:v=0:a=1"
 
-def ken_burns_filter(page_idx: int, frames: int, config: VideoConfig) -> str:
-    """Generate Ken Burns filter string — scale+crop, NOT zoompan."""
+
+def _kb_size(config: VideoConfig) -> tuple[int, int]:
+    """Size the still is scaled to before the Ken Burns crop."""
+    return int(config.width * config.kb_scale), int(config.height * config.kb_scale)
+
+
+# ken_burns_filter effects whose crop does not move over time
+STATIC_EFFECTS = (0, 2)
+
+
+def ken_burns_filter(page_idx: int, frames: int, config: VideoConfig,
+                     prescaled: bool = False) -> str:
+    """Generate Ken Burns filter string — scale+crop, NOT zoompan.
+
+    prescaled=True means the input is already SW x SH (see prescaled_still),
+    so only the per-frame crop is left. The crop still runs on yuv420p, as
+    it does after scale, so pan offsets snap to the same chroma grid.
+    """
     W, H = config.width, config.height
-    SW = int(W * config.kb_scale)
-    SH = int(H * config.kb_scale)
+    SW, SH = _kb_size(config)
     dx, dy = SW - W, SH - H
+    scale = "format=yuv420p," if prescaled else f"scale={SW}:{SH},"
 
     effects = [
         # 0: Static centered
-        f"scale={SW}:{SH},crop={W}:{H}:(ow-{W})/2:(oh-{H})/2",
+        f"{scale}crop={W}:{H}:(ow-{W})/2:(oh-{H})/2",
         # 1: Top-left → Bottom-right
-        f"scale={SW}:{SH},crop={W}:{H}:t/{frames}*{dx}:t/{frames}*{dy}",
+        f"{scale}crop={W}:{H}:t/{frames}*{dx}:t/{frames}*{dy}",
         # 2: Static centered
-        f"scale={SW}:{SH},crop={W}:{H}:(ow-{W})/2:(oh-{H})/2",
+        f"{scale}crop={W}:{H}:(ow-{W})/2:(oh-{H})/2",
         # 3: Bottom-right → Top-left
-        f"scale={SW}:{SH},crop={W}:{H}:{dx}-t/{frames}*{dx}:t/{frames}*{dy}",
+        f"{scale}crop={W}:{H}:{dx}-t/{frames}*{dx}:t/{frames}*{dy}",
     ]
     return effects[page_idx % 4]
 
 
+# (cache_dir, max_mb) -> AssetCache, shared by concurrent segment encodes
+_kb_caches = {}
+_kb_caches_lock = threading.Lock()
+
+
+def _kb_cache(config: VideoConfig):
+    from asset_cache import AssetCache
+    key = (config.kb_cache_dir, config.kb_cache_max_mb)
+    with _kb_caches_lock:
+        if key not in _kb_caches:
+            _kb_caches[key] = AssetCache(config.kb_cache_dir, max_mb=config.kb_cache_max_mb,
+                                         ext=".png")
+        return _kb_caches[key]
+
+
+def _still_path(directory: str, page_num: int) -> str:
+    return os.path.join(directory, f"page_{page_num:02d}.kb.png")
+
+
+def prescaled_still(image_path: str, config: VideoConfig, dest: str) -> str:
+    """Image scaled to the Ken Burns canvas once, cached by image content and size.
+
+    With -loop 1 ffmpeg would otherwise rescale the same still for every
+    output frame. The still is hardlinked to dest in the project, so evicting
+    the cache entry (from this or another process) cannot remove it while
+    ffmpeg reads it.
+    Returns dest, or None if caching is disabled or the scale failed
+    (callers then scale per frame).
+    """
+    if not config.kb_cache_dir:
+        return None
+    from asset_cache import cache_key
+    from fingerprint import file_digest
+
+    SW, SH = _kb_size(config)
+    cache = _kb_cache(config)
+    key = cache_key("kenburns", file_digest(image_path), SW, SH)
+    if cache.fetch(key, dest):
+        tracing.record_output(dest)
+        return dest
+
+    tmp = f"{dest}.{os.getpid()}.{threading.get_ident()}.tmp"
+    r = tracing.run(
+        ["ffmpeg", "-y", "-i", image_path, "-vf", f"scale={SW}:{SH}",
+         "-frames:v", "1", "-c:v", "png", "-compression_level", "1", "-f", "image2", tmp],
+        capture_output=True, text=True,
+    )
+    try:
+        if r.returncode != 0:
+            return None
+        cache.store(key, tmp)
+        os.replace(tmp, dest)
+        tracing.record_output(dest)
+        return dest
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+# A single x264 encode of a still-image 1080p stream stops scaling
+# beyond roughly this many threads
+_THREADS_PER_ENCODE = 4
+
+
+def encode_budget(config: VideoConfig, jobs: int) -> tuple[int, int]:
+    """Split the core budget across concurrent segment encodes.
+
+    Returns (parallel_encodes, threads_per_encode). config.encode_threads is
+    the total core budget (0 = all cores); config.encode_jobs fixes the number
+    of concurrent encodes (0 = auto, about one per _THREADS_PER_ENCODE cores).
+    """
+    cores = config.encode_threads or os.cpu_count() or 1
+    parallel = config.encode_jobs or max(1, cores // _THREADS_PER_ENCODE)
+    parallel = max(1, min(parallel, jobs, cores))
+    return parallel, max(1, cores // parallel)
+
+
+def _frame_count(duration: float, fps: int) -> int:
+    """Frames ffmpeg writes for '-r fps -t duration'."""
+    return math.ceil(duration * fps - 1e-6)
+
+
+def _cut_frames(config: VideoConfig) -> tuple[int, int, int]:
+    """(transition, fade-in, fade-out) window lengths in frames."""
+    fps = config.fps
+    return (round(config.transition_dur * fps), round(config.fade_in * fps),
+            round(config.fade_out * fps))
+
+
+def smart_cut_times(duration: float, config: VideoConfig) -> list[float]:
+    """Times a segment must have keyframes at for the smart merge.
+
+    Any page can end up first or last, so both the transition and the
+    fade windows are cut at both ends.
+    """
+    n = _frame_count(duration, config.fps)
+    t_f, fi_f, fo_f = _cut_frames(config)
+    cuts = {t_f, fi_f, n - t_f, n - fo_f}
+    return [c / config.fps for c in sorted(cuts) if 0 < c < n]
+
+
+def _smart_x264_args(config: VideoConfig) -> list[str]:
+    """Encoder settings shared by smart-merge segments and the windows spliced
+    between them, so stream-copied pieces decode with one set of parameters.
+
+    No B-frames: the concat demuxer cuts on decode timestamps, which only
+    match presentation timestamps without frame reordering.
+    """
+    return ["-c:v", "libx264", "-preset", config.preset, "-crf", str(config.crf),
+            "-bf", "0", "-pix_fmt", "yuv420p"]
+
+
 def create_segment(page_num: int, image_path: str, audio_path: str,
                    output_path: str, config: VideoConfig,
-                   ass_path: str = None) -> tuple[bool, float]:
+                   ass_path: str = None, threads: int = 0) -> tuple[bool, float]:
     """Create a single page video segment with Ken Burns. Returns (success, duration).
 
     If ass_path is provided, overlays ASS subtitle (dynamic mode).
+    threads > 0 pins this encode to its share of the core budget (see encode_budget).
+
+    Pages with a static effect and no ASS overlay show one picture for the
+    whole segment: the still is looped at 1 fps, so crop/format run once per
+    second, and the fps filter repeats it to the output rate. x264 then gets
+    -tune stillimage and a single GOP (not in smart-merge mode, where every
+    segment is encoded with _smart_x264_args). The file keeps the normal frame rate,
+    so the xfade merge treats it like any other segment.
     """
-    duration = get_audio_duration(audio_path) + config.buffer
+    duration = segment_duration(audio_path, config)
     frames = int(duration * config.fps)
-    kb = ken_burns_filter(page_num - 1, frames, config)
+    still = prescaled_still(image_path, config, _still_path(os.path.dirname(output_path), page_num))
+    kb = ken_burns_filter(page_num - 1, frames, config, prescaled=bool(still))
+    has_ass = bool(ass_path and os.path.exists(ass_path))
+    static = (page_num - 1) % 4 in STATIC_EFFECTS and not has_ass
 
     # Build filter chain
     vf = f"[0:v]{kb},format=yuv420p"
-    if ass_path and os.path.exists(ass_path):
+    if static:
+        vf += f",fps={config.fps}"
+    if has_ass:
         # Escape special chars in path for ffmpeg
         escaped_ass = ass_path.replace("\\", "\\\\").replace(":", "\\:").replace("'", "\\'")
         vf += f",ass='{escaped_ass}'"
     vf += "[v]"
 
+    if config.merge_strategy == "smart":
+        # IDR frames at every point the smart merge may cut this segment
+        times = ",".join(f"{t - 0.001:.3f}" for t in smart_cut_times(duration, config))
+        video_args = [*_smart_x264_args(config), "-forced-idr", "1",
+                      *(["-force_key_frames", times] if times else [])]
+    else:
+        video_args = ["-c:v", "libx264", "-preset", config.preset, "-crf", str(config.crf)]
+        # Not for smart merge: its stream-copied pieces of every page must
+        # share the one parameter set from _smart_x264_args
+        if static:
+            video_args += ["-tune", "stillimage", "-g", str(frames + 1)]
+
+    thread_args = ["-filter_complex_threads", str(threads)] if threads else []
+    tmp = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp.mp4"
     cmd = [
-        "ffmpeg", "-y",
-        "-loop", "1", "-i", image_path,
+        "ffmpeg", "-y", *thread_args,
+        "-loop", "1", *(["-framerate", "1"] if static else []), "-i", still or image_path,
         "-i", audio_path,
         "-filter_complex", vf,
         "-map", "[v]", "-map", "1:a",
-        "-c:v", "libx264", "-preset", config.preset, "-crf", str(config.crf),
+        *video_args,
+        *(["-threads", str(threads)] if threads else []),
         "-c:a", "aac", "-b:a", "192k",
         "-r", str(config.fps), "-t", str(duration),
-        output_path,
+        tmp,
     ]
-    r = subprocess.run(cmd, capture_output=True, text=True)
+    # Encode beside the output and move it into place, so a failed or
+    # interrupted encode never leaves a truncated segment behind
+    r = tracing.run(cmd, capture_output=True, text=True)
     if r.returncode == 0:
+        os.replace(tmp, output_path)
         return True, duration
-    else:
-        print(f"    ffmpeg error: {r.stderr[-200:]}")
-        return False, 0.0
+    if os.path.exists(tmp):
+        os.unlink(tmp)
+    if os.path.exists(output_path):
+        os.unlink(output_path)
+    print(f"    ffmpeg error: {r.stderr[-200:]}")
+    return False, 0.0
+
+
+def _transition_graph(video_labels: list[str], durations: list[float],
+                      config: VideoConfig, transition_ids: list[int] = None,
+                      fades: bool = True) -> tuple[str, float]:
+    """xfade chain over the given video streams plus fade in/out, ending in [vout].
+
+    transition_ids picks config.transitions[id] for each boundary (default:
+    boundary i uses transition i), so a partial chain can reproduce the
+    transitions it would get in the full chain. fades=False leaves out the
+    fade in/out (intermediate chunks of a chunked merge).
+
+    Returns (filter graph text ending in ';', total duration).
+    """
+    n = len(video_labels)
+    if transition_ids is None:
+        transition_ids = list(range(n - 1))
+
+    offsets = xfade_offsets(durations, config)
+
+    # Build video xfade chain
+    fstr = ""
+    prev = video_labels[0]
+    for i in range(n - 1):
+        ni = video_labels[i + 1]
+        ol = f"[v{i}]" if i < n - 2 else ("[vpre]" if fades else "[vout]")
+        trans = config.transitions[transition_ids[i] % len(config.transitions)]
+        fstr += f"{prev}{ni}xfade=transition={trans}:duration={config.transition_dur}:offset={offsets[i]:.3f}{ol};"
+        prev = ol
+
+    total_dur = sum(durations) - (n - 1) * config.transition_dur
+    if not fades:
+        return fstr, total_dur
+
+    # Fade in/out on the joined stream
+    fade_out_start = max(0, total_dur - config.fade_out)
+    fstr += f"[vpre]fade=t=in:st=0:d={config.fade_in},fade=t=out:st={fade_out_start:.3f}:d={config.fade_out}[vout];"
+    return fstr, total_dur
+
+
+def _bgm_mix(voice: str, bgm_idx: int, total_dur: float, bgm: BGMConfig, out: str) -> str:
+    """Graph that loops/trims/fades BGM input bgm_idx and mixes it under the voice
+    pad, exactly like add_bgm_to_video. The BGM input needs -stream_loop -1."""
+    fade_out_start = max(0, total_dur - bgm.fade_out)
+    return (
+        f"{voice}volume=1.0[voice];"
+        f"[{bgm_idx}:a]atrim=0:{total_dur:.3f},"
+        f"afade=t=in:st=0:d={bgm.fade_in},"
+        f"afade=t=out:st={fade_out_start:.3f}:d={bgm.fade_out},"
+        f"volume={bgm.volume}[b];"
+        f"[voice][b]amix=inputs=2:duration=first:dropout_transition=2{out}"
+    )
+
+
+def _mp4_outputs(output_path: str, bgm_output: str = None) -> list[str]:
+    """Muxer args for the final mp4, or for two mp4s sharing one video encode.
+
+    With bgm_output the first mapped audio stream goes to output_path and the
+    second (BGM mix) to bgm_output through the tee muxer.
+    """
+    if not bgm_output:
+        return ["-movflags", "+faststart", output_path]
+    slaves = "|".join(
+        f"[f=mp4:movflags=+faststart:select=\\'v:0,a:{i}\\']{path}"
+        for i, path in enumerate([output_path, bgm_output])
+    )
+    return ["-flags", "+global_header", "-f", "tee", slaves]
 
 
 def merge_segments(segment_files: list[str], durations: list[float],
-                   output_path: str, config: VideoConfig) -> bool:
-    """Merge segments with xfade transitions and fade in/out."""
+                   output_path: str, config: VideoConfig,
+                   audio_files: list[str] = None, bgm: BGMConfig = None,
+                   bgm_output: str = None) -> bool:
+    """Merge segments with xfade transitions and fade in/out.
+
+    audio_files: the pages' narration WAVs, in segment order. When given, the
+    soundtrack is built from them in the PCM domain (write_narration_timeline)
+    and encoded once, instead of decoding and re-encoding every segment's AAC.
+
+    bgm + bgm_output: also write bgm_output with BGM mixed in, from the same
+    video encode (no separate add_bgm_to_video pass). The fallback concat
+    does not do this, so callers check bgm_output exists afterwards.
+    """
     n = len(segment_files)
     if n < 2:
         print("Need at least 2 segments to merge")
         return False
+    if not (bgm and bgm_output):
+        bgm = bgm_output = None
 
-    # Build inputs
+    if not audio_files or len(audio_files) != n:
+        return _merge_segments(segment_files, durations, output_path, config,
+                               bgm=bgm, bgm_output=bgm_output)
+
+    fd, timeline = tempfile.mkstemp(prefix="narration_", suffix=".wav",
+                                    dir=os.path.dirname(os.path.abspath(output_path)))
+    os.close(fd)
+    try:
+        if not write_narration_timeline(audio_files, durations, timeline, config):
+            print("  Narration WAVs are not one 16-bit PCM format, using segment audio")
+            os.unlink(timeline)
+            timeline = None
+        return _merge_segments(segment_files, durations, output_path, config, timeline,
+                               bgm=bgm, bgm_output=bgm_output)
+    finally:
+        if timeline:
+            os.unlink(timeline)
+
+
+def _merge_segments(segment_files: list[str], durations: list[float],
+                    output_path: str, config: VideoConfig, audio_path: str = None,
+                    bgm: BGMConfig = None, bgm_output: str = None) -> bool:
+    """Pick smart, chunked or flat merge; audio_path replaces the segments' audio."""
+    n = len(segment_files)
+    if config.merge_strategy == "smart":
+        if merge_segments_smart(segment_files, durations, output_path, config, audio_path,
+                                bgm=bgm, bgm_output=bgm_output):
+            return True
+        print("  Falling back to full xfade merge...")
+
+    if config.merge_chunk_size >= 2 and n > config.merge_chunk_size:
+        return merge_segments_chunked(segment_files, durations, output_path, config,
+                                      audio_path, bgm=bgm, bgm_output=bgm_output)
+
+    r, total_dur = _xfade_encode(segment_files, durations, list(range(n - 1)),
+                                 output_path, config, audio_path=audio_path,
+                                 bgm=bgm, bgm_output=bgm_output)
+    if r.returncode == 0:
+        _report_outputs(output_path, bgm_output, total_dur)
+        return True
+    else:
+        print(f"  xfade merge failed: {r.stderr[-300:]}")
+        # Try fallback
+        print("  Trying fallback concat...")
+        return fallback_concat(segment_files, output_path, config)
+
+
+def _report_outputs(output_path: str, bgm_output: str, total_dur: float) -> None:
+    for path in filter(None, [output_path, bgm_output]):
+        tracing.record_output(path)
+        sz = os.path.getsize(path) / (1024 * 1024)
+        print(f"  Output: {path} ({sz:.1f}MB, ~{total_dur:.0f}s)")
+
+
+def _xfade_encode(files: list[str], durations: list[float], transition_ids: list[int],
+                  output_path: str, config: VideoConfig, final: bool = True,
+                  threads: int = 0, normalize: bool = False, audio_path: str = None,
+                  bgm: BGMConfig = None, bgm_output: str = None):
+    """One ffmpeg xfade + audio concat over files. Returns (CompletedProcess, duration).
+
+    final=False writes a lossless intermediate without fades for a later stage.
+    normalize=True resamples every input to a constant frame rate and common
+    timebase first, which xfade needs when segments and intermediates mix.
+    audio_path (a narration timeline WAV) is used as the soundtrack instead
+    of concatenating the inputs' audio. bgm/bgm_output (final only) add a
+    second output with BGM mixed in (see merge_segments).
+    """
+    n = len(files)
     inputs = []
-    for f in segment_files:
+    for f in files:
         inputs += ["-i", f]
+    if audio_path:
+        inputs += ["-i", audio_path]
 
-    # Calculate offsets
-    offsets = []
-    cumulative = 0.0
-    for i in range(n - 1):
-        cumulative += durations[i]
-        offsets.append(max(0, cumulative - (i + 1) * config.transition_dur))
-
-    # Build video xfade chain
     fstr = ""
-    prev = "[0:v]"
-    for i in range(n - 1):
-        ni = f"[{i+1}:v]"
-        ol = f"[v{i}]" if i < n - 2 else "[vout]"
-        trans = config.transitions[i % len(config.transitions)]
-        fstr += f"{prev}{ni}xfade=transition={trans}:duration={config.transition_dur}:offset={offsets[i]:.3f}{ol};"
-        prev = ol
+    labels = [f"[{i}:v]" for i in range(n)]
+    if normalize:
+        for i in range(n):
+            fstr += f"[{i}:v]fps={config.fps},settb=AVTB[n{i}];"
+        labels = [f"[n{i}]" for i in range(n)]
+
+    vstr, total_dur = _transition_graph(labels, durations, config, transition_ids,
+                                        fades=final)
+    fstr += vstr
 
     # Audio concat
-    astr = "".join(f"[{i}:a]" for i in range(n))
-    fstr += f"{astr}concat=n={n}:v=0:a=1[aout]"
+    if audio_path:
+        voice = f"[{n}:a]anull"
+    else:
+        voice = _voice_concat(0, durations, config)
+    audio_maps = ["-map", "[aout]"]
+    if final and bgm_output:
+        inputs += ["-stream_loop", "-1", "-i", bgm.file]
+        bgm_idx = n + (1 if audio_path else 0)
+        fstr += f"{voice},asplit=2[aout][avoice];"
+        fstr += _bgm_mix("[avoice]", bgm_idx, total_dur, bgm, "[abgm]")
+        audio_maps += ["-map", "[abgm]"]
+    else:
+        fstr += f"{voice}[aout]"
 
-    # Insert fade in/out before [vout]
-    total_dur = sum(durations) - (n - 1) * config.transition_dur
-    fade_out_start = max(0, total_dur - config.fade_out)
-    fstr = fstr.replace(
-        "[vout];",
-        f"[vpre];[vpre]fade=t=in:st=0:d={config.fade_in},fade=t=out:st={fade_out_start:.3f}:d={config.fade_out}[vout];",
+    if final:
+        codec_args = ["-c:v", "libx264", "-preset", config.preset, "-crf", str(config.crf),
+                      *(["-threads", str(threads)] if threads else []),
+                      "-c:a", "aac", "-b:a", "192k"]
+        output_args = _mp4_outputs(output_path, bgm_output)
+    else:
+        codec_args = ["-c:v", "libx264", "-preset", "ultrafast", "-qp", "0",
+                      *(["-threads", str(threads)] if threads else []),
+                      "-c:a", "pcm_f32le"]
+        output_args = [output_path]
+
+    cmd = [
+        "ffmpeg", "-y", *inputs,
+        "-filter_complex", fstr,
+        "-map", "[vout]", *audio_maps,
+        *codec_args,
+        *output_args,
+    ]
+    return tracing.run(cmd, capture_output=True, text=True), total_dur
+
+
+def merge_segments_chunked(segment_files: list[str], durations: list[float],
+                           output_path: str, config: VideoConfig,
+                           audio_path: str = None, bgm: BGMConfig = None,
+                           bgm_output: str = None) -> bool:
+    """Merge in a tree: xfade groups of merge_chunk_size segments, then join the groups.
+
+    Each group becomes a lossless intermediate (no fades), built in parallel;
+    groups of intermediates are joined the same way until one stage is left,
+    which adds the fades and does the real encode. A group's duration is
+    sum(d) - (k-1)*transition_dur and every boundary keeps the transition it
+    has in the flat chain, so every xfade offset matches merge_segments.
+    """
+    k = config.merge_chunk_size
+    files = list(segment_files)
+    durs = list(durations)
+    # Global index of the boundary after each file (the last file has none)
+    bounds = list(range(len(files) - 1))
+
+    work_dir = tempfile.mkdtemp(prefix="chunk_merge_", dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        level = 0
+        while len(files) > k:
+            level += 1
+            groups = [range(i, min(i + k, len(files))) for i in range(0, len(files), k)]
+            jobs, threads = encode_budget(config, len(groups))
+            print(f"  Chunked merge level {level}: {len(files)} inputs -> {len(groups)} chunks "
+                  f"({jobs} parallel)")
+
+            def build(gi, group):
+                if len(group) == 1:
+                    return files[group[0]], durs[group[0]], True
+                out = os.path.join(work_dir, f"level{level}_chunk{gi:03d}.mov")
+                r, dur = _xfade_encode(
+                    [files[i] for i in group], [durs[i] for i in group],
+                    [bounds[i] for i in group[:-1]], out, config, final=False,
+                    threads=threads, normalize=True,
+                )
+                if r.returncode != 0:
+                    print(f"    chunk {gi} failed: {r.stderr[-200:]}")
+                return out, dur, r.returncode == 0
+
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                results = list(pool.map(lambda g: build(*g), enumerate(groups)))
+            if not all(ok for _, _, ok in results):
+                print("  Trying fallback concat...")
+                return fallback_concat(segment_files, output_path, config)
+
+            files = [f for f, _, _ in results]
+            durs = [d for _, d, _ in results]
+            bounds = [bounds[g[-1]] for g in groups[:-1]]
+
+        r, total_dur = _xfade_encode(files, durs, bounds, output_path, config,
+                                     normalize=True, audio_path=audio_path,
+                                     bgm=bgm, bgm_output=bgm_output)
+        if r.returncode != 0:
+            print(f"  xfade merge failed: {r.stderr[-300:]}")
+            print("  Trying fallback concat...")
+            return fallback_concat(segment_files, output_path, config)
+        _report_outputs(output_path, bgm_output, total_dur)
+        return True
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _keyframe_times(path: str) -> list[float]:
+    """Presentation times of the video keyframes in a file (packet scan, no decode)."""
+    r = tracing.run(
+        ["ffprobe", "-v", "error", "-select_streams", "v:0",
+         "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", path],
+        capture_output=True, text=True,
     )
+    times = []
+    for line in r.stdout.splitlines():
+        pts, _, flags = line.partition(",")
+        if flags.startswith("K"):
+            times.append(float(pts))
+    return times
+
+
+def _encode_window(cmd_inputs: list[str], vfilter: str, output_path: str,
+                   frames: int, config: VideoConfig, threads: int) -> bool:
+    """Encode one short re-rendered window (transition or fade), video only."""
+    cmd = [
+        "ffmpeg", "-y", *cmd_inputs,
+        "-filter_complex", f"{vfilter},fps={config.fps}[v]",
+        "-map", "[v]", "-an",
+        *_smart_x264_args(config),
+        *(["-threads", str(threads)] if threads else []),
+        "-frames:v", str(frames),
+        output_path,
+    ]
+    r = tracing.run(cmd, capture_output=True, text=True)
+    if r.returncode != 0:
+        print(f"    window encode failed: {r.stderr[-200:]}")
+    return r.returncode == 0
+
+
+def merge_segments_smart(segment_files: list[str], durations: list[float],
+                         output_path: str, config: VideoConfig,
+                         audio_path: str = None, bgm: BGMConfig = None,
+                         bgm_output: str = None) -> bool:
+    """Merge by re-encoding only the transition and fade windows.
+
+    Segments encoded with merge_strategy: smart carry IDR frames at their
+    window edges (smart_cut_times). Each xfade overlap and the opening
+    fade-in / closing fade-out are rendered as short clips; the untouched
+    middle of every segment is stream-copied through the concat demuxer.
+    The soundtrack (audio_path, or the segments' audio concatenated) is
+    encoded once, exactly as in merge_segments. Returns False (caller falls back) if a segment is too
+    short for its windows or lacks the keyframes.
+    """
+    n = len(segment_files)
+    fps = config.fps
+    t_f, fi_f, fo_f = _cut_frames(config)
+    frames = [_frame_count(d, fps) for d in durations]
+
+    # Plan every segment: [head window | stream-copied middle | tail window]
+    pieces = []                 # (start_frame, end_frame) of each middle
+    for i, nf in enumerate(frames):
+        head = fi_f if i == 0 else t_f
+        tail = fo_f if i == n - 1 else t_f
+        if head + tail > nf:
+            print(f"  Smart merge: segment {i + 1} too short for its windows")
+            return False
+        pieces.append((head, nf - tail))
+
+    for i, (seg, (start, end)) in enumerate(zip(segment_files, pieces)):
+        keys = _keyframe_times(seg)
+        for cut in (start, end):
+            if 0 < cut < frames[i] and not any(abs(k - cut / fps) < 0.5 / fps for k in keys):
+                print(f"  Smart merge: {os.path.basename(seg)} has no keyframe at "
+                      f"{cut / fps:.3f}s (re-encode segments with merge_strategy: smart)")
+                return False
+
+    work_dir = tempfile.mkdtemp(prefix="smart_merge_", dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        # Windows to re-render: (inputs, filter, frames, output)
+        windows = []
+        if fi_f:
+            windows.append((
+                ["-i", segment_files[0]],
+                f"[0:v]trim=end_frame={fi_f},fade=t=in:st=0:d={config.fade_in}",
+                fi_f, os.path.join(work_dir, "fade_in.mp4"),
+            ))
+        for i in range(n - 1):
+            start = (frames[i] - t_f) / fps
+            trans = config.transitions[i % len(config.transitions)]
+            windows.append((
+                ["-ss", f"{start:.6f}", "-i", segment_files[i], "-i", segment_files[i + 1]],
+                f"[0:v]setpts=PTS-STARTPTS,fps={fps}[a];[1:v]trim=end_frame={t_f},fps={fps}[b];"
+                f"[a][b]xfade=transition={trans}:duration={config.transition_dur}:offset=0",
+                t_f, os.path.join(work_dir, f"transition_{i:03d}.mp4"),
+            ))
+        if fo_f:
+            start = (frames[-1] - fo_f) / fps
+            windows.append((
+                ["-ss", f"{start:.6f}", "-i", segment_files[-1]],
+                f"[0:v]setpts=PTS-STARTPTS,fade=t=out:st=0:d={config.fade_out}",
+                fo_f, os.path.join(work_dir, "fade_out.mp4"),
+            ))
+
+        jobs, threads = encode_budget(config, len(windows))
+        print(f"  Smart merge: re-encoding {len(windows)} windows "
+              f"({jobs} parallel), stream-copying {n} segment bodies")
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(
+                lambda w: _encode_window(w[0], w[1], w[3], w[2], config, threads),
+                windows,
+            ))
+        if not all(results):
+            return False
+
+        # Concat list: fade-in, then per segment [body, transition], then fade-out
+        by_name = {os.path.basename(w[3]): w for w in windows}
+        lines = []
+
+        def add_window(name):
+            if name in by_name:
+                lines.append(f"file '{by_name[name][3]}'")
+                lines.append(f"duration {by_name[name][2] / fps:.6f}")
+
+        add_window("fade_in.mp4")
+        for i, (seg, (start, end)) in enumerate(zip(segment_files, pieces)):
+            if end > start:
+                lines.append(f"file '{os.path.abspath(seg)}'")
+                lines.append(f"inpoint {start / fps:.6f}")
+                lines.append(f"outpoint {end / fps:.6f}")
+            add_window(f"transition_{i:03d}.mp4")
+        add_window("fade_out.mp4")
+
+        list_path = os.path.join(work_dir, "concat.txt")
+        with open(list_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+        total_dur = sum(frames) / fps - (n - 1) * t_f / fps
+        if audio_path:
+            audio_inputs = ["-i", audio_path]
+            voice = "[1:a]anull"
+        else:
+            audio_inputs = []
+            for seg in segment_files:
+                audio_inputs += ["-i", seg]
+            voice = _voice_concat(1, durations, config)
+        audio_maps = ["-map", "[aout]"]
+        if bgm_output:
+            audio_inputs += ["-stream_loop", "-1", "-i", bgm.file]
+            bgm_idx = 1 + (1 if audio_path else n)
+            astr = (f"{voice},asplit=2[aout][avoice];"
+                    + _bgm_mix("[avoice]", bgm_idx, total_dur, bgm, "[abgm]"))
+            audio_maps += ["-map", "[abgm]"]
+        else:
+            astr = f"{voice}[aout]"
+        cmd = [
+            "ffmpeg", "-y",
+            "-f", "concat", "-safe", "0", "-i", list_path,
+            *audio_inputs,
+            "-filter_complex", astr,
+            "-map", "0:v", *audio_maps,
+            "-c:v", "copy",
+            "-c:a", "aac", "-b:a", "192k",
+            *_mp4_outputs(output_path, bgm_output),
+        ]
+        r = tracing.run(cmd, capture_output=True, text=True)
+        if r.returncode != 0:
+            print(f"  Smart merge join failed: {r.stderr[-300:]}")
+            return False
+
+        _report_outputs(output_path, bgm_output, total_dur)
+        return True
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def render_single_pass(pages: list[tuple], output_path: str, config: VideoConfig,
+                       bgm: BGMConfig = None, still_dir: str = None) -> bool:
+    """Render the final video from stills and WAVs in one ffmpeg graph.
+
+    pages: [(page_num, image_path, audio_path, ass_path or None), ...] in order.
+    Each page gets the same Ken Burns + ASS chain as create_segment, the pages
+    are joined with the merge_segments xfade/fade chain, and the narration WAVs
+    are laid out on the same timeline as merge_segments does. If bgm is given
+    it is looped, trimmed, faded and mixed like add_bgm_to_video. Everything
+    is encoded exactly once. Pre-scaled stills are linked into still_dir
+    (default: beside output_path).
+    """
+    n = len(pages)
+    if n < 2:
+        print("Need at least 2 pages to render")
+        return False
+
+    audio_files = [audio_path for _, _, audio_path, _ in pages]
+    durations, _, _ = plan_timeline(audio_files, config)
+    fd, timeline = tempfile.mkstemp(prefix="narration_", suffix=".wav",
+                                    dir=os.path.dirname(os.path.abspath(output_path)))
+    os.close(fd)
+    try:
+        if not write_narration_timeline(audio_files, durations, timeline, config):
+            print("  Narration WAVs are not one 16-bit PCM format, concatenating them")
+            os.unlink(timeline)
+            timeline = None
+        return _render_single_pass(pages, durations, timeline, output_path, config, bgm,
+                                   still_dir or os.path.dirname(os.path.abspath(output_path)))
+    finally:
+        if timeline:
+            os.unlink(timeline)
+
+
+def _render_single_pass(pages: list[tuple], durations: list[float], timeline: str,
+                        output_path: str, config: VideoConfig, bgm: BGMConfig,
+                        still_dir: str) -> bool:
+    n = len(pages)
+    inputs = []
+    fstr = ""
+    for i, (page_num, image_path, audio_path, ass_path) in enumerate(pages):
+        duration = durations[i]
+        frames = int(duration * config.fps)
+        still = prescaled_still(image_path, config, _still_path(still_dir, page_num))
+        inputs += ["-loop", "1", "-t", f"{duration:.3f}", "-i", still or image_path]
+
+        kb = ken_burns_filter(page_num - 1, frames, config, prescaled=bool(still))
+        chain = f"[{i}:v]{kb},format=yuv420p"
+        if ass_path and os.path.exists(ass_path):
+            escaped_ass = ass_path.replace("\\", "\\\\").replace(":", "\\:").replace("'", "\\'")
+            chain += f",ass='{escaped_ass}'"
+        # Constant frame rate so every xfade input has the same timebase
+        fstr += f"{chain},fps={config.fps}[p{i}];"
+
+    vstr, total_dur = _transition_graph([f"[p{i}]" for i in range(n)], durations, config)
+    fstr += vstr
+
+    if timeline:
+        inputs += ["-i", timeline]
+        voice = f"[{n}:a]anull"
+    else:
+        for _, _, audio_path, _ in pages:
+            inputs += ["-i", audio_path]
+        voice = _voice_concat(n, durations, config)
+    if bgm:
+        bgm_idx = n + (1 if timeline else n)
+        inputs += ["-stream_loop", "-1", "-i", bgm.file]
+        fstr += f"{voice}[avoice];" + _bgm_mix("[avoice]", bgm_idx, total_dur, bgm, "[aout]")
+    else:
+        fstr += f"{voice}[aout]"
 
     cmd = [
         "ffmpeg", "-y", *inputs,
@@ -123,19 +847,17 @@ def merge_segments(segment_files: list[str], durations: list[float],
         "-map", "[vout]", "-map", "[aout]",
         "-c:v", "libx264", "-preset", config.preset, "-crf", str(config.crf),
         "-c:a", "aac", "-b:a", "192k",
+        "-r", str(config.fps),
         "-movflags", "+faststart",
         output_path,
     ]
-    r = subprocess.run(cmd, capture_output=True, text=True)
+    r = tracing.run(cmd, capture_output=True, text=True)
     if r.returncode == 0:
         sz = os.path.getsize(output_path) / (1024 * 1024)
         print(f"  Output: {output_path} ({sz:.1f}MB, ~{total_dur:.0f}s)")
         return True
-    else:
-        print(f"  xfade merge failed: {r.stderr[-300:]}")
-        # Try fallback
-        print("  Trying fallback concat...")
-        return fallback_concat(segment_files, output_path, config)
+    print(f"  single-pass render failed: {r.stderr[-300:]}")
+    return False
 
 
 def fallback_concat(segment_files: list[str], output_path: str,
@@ -157,7 +879,7 @@ def fallback_concat(segment_files: list[str], output_path: str,
             "-movflags", "+faststart",
             output_path,
         ]
-        r = subprocess.run(cmd, capture_output=True, text=True)
+        r = tracing.run(cmd, capture_output=True, text=True)
         if r.returncode == 0:
             sz = os.path.getsize(output_path) / (1024 * 1024)
             print(f"  Fallback output: {output_path} ({sz:.1f}MB)")